@@ -0,0 +1,264 @@
+"""
+match.py の整形・絞り込み・ページングのベンチマーク
+
+合成した戦績とメンバー名簿をメモリ上の SQLite に入れ、
+偽の Interaction でコマンドを端から端まで実行して
+スループットとピークメモリを表示する。
+
+    cd app
+    python -m bench.bench_match                 # 10000件, 100000件
+    python -m bench.bench_match --rows 5000
+"""
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# ネットワークなしで動かすため、import 前にローカルのストレージを指定する
+os.environ["DB_BACKEND"] = "sqlite"
+os.environ["SQLITE_PATH"] = ":memory:"
+os.environ["WRITE_JOURNAL"] = os.path.join(tempfile.gettempdir(), "bench_journal.jsonl")
+
+import cogs.match as match                          # noqa: E402
+from services.database import db                    # noqa: E402
+from services.members import member_registry        # noqa: E402
+from services.result_mirror import mirror           # noqa: E402
+
+MEMBER_COUNT = 40
+ENEMY_COUNT = 200
+
+
+# ---- 合成データ ----
+
+def make_roster(path, count=MEMBER_COUNT):
+    names = [f"m{i:02d}" for i in range(count)]
+    with open(path, "w", encoding="utf-8") as f:
+        for i, name in enumerate(names):
+            f.write(f"{name}:{100000 + i}:{name},{name}x,a{i}\n")
+    return names
+
+
+def make_enemies(count=ENEMY_COUNT):
+    return [f"E{i:03d}" for i in range(count)]
+
+
+def random_date(rng):
+    return (
+        f"{rng.randint(2023, 2025)}{rng.randint(1, 12):02d}"
+        f"{rng.randint(1, 28):02d}{rng.randint(18, 23):02d}"
+    )
+
+
+def make_rows_12(rng, n, names, enemies):
+    rows = []
+    for _ in range(n):
+        date = random_date(rng)
+        rows.append({
+            "player": " ".join(rng.sample(names, 6)),
+            "my_score": rng.randint(300, 600),
+            # よく当たる相手ほど多く出るように偏らせる
+            "enemy": enemies[int(rng.paretovariate(1.2)) % len(enemies)],
+            "enemy_score": rng.randint(300, 600),
+            "date": match.format_date(date),
+            "played_at": match.parse_played_at(date),
+        })
+    return rows
+
+
+def make_rows_24(rng, n, names, enemies):
+    rows = []
+    for _ in range(n):
+        date = random_date(rng)
+        my_score = rng.randint(150, 400)
+        others = [rng.randint(150, 400) for _ in range(3)]
+        teams = rng.sample(enemies, 3)
+        rows.append({
+            "player": " ".join(rng.sample(names, 6)),
+            "my_score": my_score,
+            "enemy1": teams[0], "score1": others[0],
+            "enemy2": teams[1], "score2": others[1],
+            "enemy3": teams[2], "score3": others[2],
+            "rank": match.calc_rank(my_score, others),
+            "date": match.format_date(date),
+            "played_at": match.parse_played_at(date),
+        })
+    return rows
+
+
+# ---- 偽の Interaction ----
+
+class FakeResponse:
+    async def defer(self, **kwargs):
+        pass
+
+    async def edit_message(self, **kwargs):
+        pass
+
+    async def send_message(self, *args, **kwargs):
+        pass
+
+
+class FakeFollowup:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, *args, **kwargs):
+        self.sent.append((args, kwargs))
+
+
+class FakeInteraction:
+    def __init__(self):
+        self.guild = None
+        self.response = FakeResponse()
+        self.followup = FakeFollowup()
+
+    def last_view(self):
+        return self.followup.sent[-1][1].get("view")
+
+
+# ---- 計測 ----
+
+class Bench:
+    def __init__(self):
+        self.results = []
+
+    async def run(self, label, count, func):
+        tracemalloc.start()
+        start = time.perf_counter()
+        await func()
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        self.results.append((label, count, elapsed, peak))
+
+    def report(self, rows):
+        print(f"\n== {rows} 件 ==")
+        print(f"{'項目':<34}{'回数':>8}{'秒':>10}{'回/秒':>12}{'peak KiB':>12}")
+        for label, count, elapsed, peak in self.results:
+            rate = count / elapsed if elapsed else float("inf")
+            print(
+                f"{label:<36}{count:>8}{elapsed:>10.3f}"
+                f"{rate:>12.0f}{peak / 1024:>12.0f}"
+            )
+        self.results = []
+
+
+async def bench_size(n, seed=0):
+    rng = random.Random(seed)
+    bench = Bench()
+
+    roster = tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False)
+    roster.close()
+    names = make_roster(roster.name)
+    member_registry.path = roster.name
+    enemies = make_enemies()
+
+    rows_12 = make_rows_12(rng, n, names, enemies)
+    rows_24 = make_rows_24(rng, n, names, enemies)
+
+    # ストレージ投入とミラー同期
+    async def load_storage():
+        nonlocal rows_12, rows_24
+        rows_12 = await db.insert_results("result_12", rows_12)
+        rows_24 = await db.insert_results("result_24", rows_24)
+    await bench.run("SQLite 一括登録", 2 * n, load_storage)
+
+    async def sync_mirror():
+        await mirror.sync_all(full=True)
+    await bench.run("ミラー全件同期", 2 * n, sync_mirror)
+
+    # 純粋な関数
+    async def calc_rank_all():
+        for r in rows_24:
+            match.calc_rank(r["my_score"], [r["score1"], r["score2"], r["score3"]])
+    await bench.run("calc_rank", n, calc_rank_all)
+
+    async def sorted_teams_all():
+        for r in rows_24:
+            match.get_sorted_teams_24(r)
+    await bench.run("get_sorted_teams_24", n, sorted_teams_all)
+
+    pages_12 = [rows_12[i:i + match.PER_PAGE] for i in range(0, n, match.PER_PAGE)]
+    pages_24 = [rows_24[i:i + match.PER_PAGE] for i in range(0, n, match.PER_PAGE)]
+
+    async def embed_12_all():
+        for i, page in enumerate(pages_12):
+            match.build_embed_12(page, i, len(pages_12))
+    await bench.run("build_embed_12 (ページ)", len(pages_12), embed_12_all)
+
+    async def embed_24_all():
+        for i, page in enumerate(pages_24):
+            match.build_embed_24(page, i, len(pages_24))
+    await bench.run("build_embed_24 (ページ)", len(pages_24), embed_24_all)
+
+    # コマンドを端から端まで
+    cog = match.ResultRegister(bot=None)
+    member = names[0]
+    enemy = enemies[0]
+    queries = [
+        ("条件なし", {}),
+        ("member", {"member": member}),
+        ("enemy", {"enemy": enemy}),
+        ("member+enemy", {"member": member, "enemy": enemy}),
+        ("期間", {"since": "20240301", "until": "20240331"}),
+    ]
+    repeat = 200
+
+    for command in (cog.result_12, cog.result_24):
+        for label, kwargs in queries:
+            async def run_command():
+                for _ in range(repeat):
+                    await command.callback(cog, FakeInteraction(), **kwargs)
+            await bench.run(f"/{command.name} {label}", repeat, run_command)
+
+        # ページ送り（最終ページから先頭まで戻って再び進む）
+        interaction = FakeInteraction()
+        await command.callback(cog, interaction)
+        view = interaction.last_view()
+        clicks = 2 * (view.total_pages - 1)
+
+        async def paging():
+            for _ in range(view.total_pages - 1):
+                await view.prev.callback(FakeInteraction())
+            for _ in range(view.total_pages - 1):
+                await view.next.callback(FakeInteraction())
+        await bench.run(f"/{command.name} ページ送り", clicks, paging)
+
+    # 登録行の作成（メンバー解決・順位計算を含む）
+    async def build_rows():
+        for r in rows_24[:repeat * 10]:
+            await match.build_row_24(
+                FakeInteraction(),
+                f'{r["enemy1"]} {r["enemy2"]} {r["enemy3"]}',
+                f'{r["my_score"]} {r["score1"]} {r["score2"]} {r["score3"]}',
+                "2025010122",
+                r["player"],
+            )
+    await bench.run("build_row_24", min(n, repeat * 10), build_rows)
+
+    bench.report(n)
+    os.unlink(roster.name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--rows", type=int, nargs="+", default=[10_000, 100_000],
+        help="テーブルごとの件数"
+    )
+    args = parser.parse_args()
+
+    if len(args.rows) == 1:
+        asyncio.run(bench_size(args.rows[0]))
+    else:
+        # 件数ごとに別プロセスで実行し、空のストレージ・ミラーから始める
+        for n in args.rows:
+            subprocess.run(
+                [sys.executable, "-m", "bench.bench_match", "--rows", str(n)],
+                check=True
+            )
@@ -0,0 +1,52 @@
+import discord
+from discord import app_commands
+from discord.ext import commands
+from services.members import member_registry
+
+# 管理者向けのコマンド
+class Admin(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    # /reload_data
+    @app_commands.command(
+        name="reload_data",
+        description="コース・接続・メンバーのデータを再起動せずに読み直します"
+    )
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.checks.has_permissions(administrator=True)
+    async def reload_data(self, interaction: discord.Interaction):
+        await interaction.response.defer(ephemeral=True)
+
+        # どれかが失敗しても他は読み直し、失敗したものは今のデータのまま
+        lines = []
+
+        track = self.bot.get_cog("Track")
+        if track is None:
+            lines.append("コース: Track が読み込まれていません")
+        else:
+            try:
+                data = await track.reload_data()
+                lines.append(f"コース: 別名 {len(data.track_dict)} / 接続 {len(data.connects)}")
+            except Exception as e:
+                lines.append(f"コース: 失敗（{e}）")
+
+        try:
+            members = await member_registry.force_reload()
+            lines.append(f"メンバー: {len(members.id_map)}人")
+        except Exception as e:
+            # db の場合は接続エラーなども来るので、何でも報告して応答を返す
+            lines.append(f"メンバー: 失敗（{e}）")
+
+        await interaction.followup.send("\n".join(lines), ephemeral=True)
+
+    @reload_data.error
+    async def reload_data_error(self, interaction: discord.Interaction, error):
+        if isinstance(error, app_commands.MissingPermissions):
+            await interaction.response.send_message("管理者のみ実行できます。", ephemeral=True)
+            return
+        raise error
+
+
+async def setup(bot):
+    await bot.add_cog(Admin(bot))
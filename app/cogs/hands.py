@@ -6,6 +6,9 @@ import random
 from discord import app_commands
 from discord.ext import commands
 import re
+from services.members import member_registry
+from services.result_mirror import mirror
+from services.lineup import lineup_stats, best_lineups, LINEUP_SIZE
 
 # hoursロールidの保存場所
 HOUR_JSON = os.path.join(os.path.dirname(__file__), "..", "hours.json")
@@ -272,6 +275,44 @@ class Handraise(commands.Cog):
         member = random.choice(role.members)
         await interaction.response.send_message(f" {hour} の外交担当: {member.mention}")
 
+    # /lineup hour:○○
+    @app_commands.command(name="lineup")
+    async def lineup_hour(self, interaction: discord.Interaction, hour: str):
+        """そのhourのメンバーから過去の戦績で6人の編成を提案する"""
+        hours = load_hours()
+        if hour not in hours:
+            await interaction.response.send_message("そのhourはありません。", ephemeral=True)
+            return
+
+        role = interaction.guild.get_role(hours[hour])
+        members = [m for m in role.members if not m.bot] if role else []
+        if len(members) < LINEUP_SIZE:
+            await interaction.response.send_message(
+                f"そのhourのメンバーが{LINEUP_SIZE}人未満です。", ephemeral=True
+            )
+            return
+
+        await interaction.response.defer()
+
+        for table in ("result_12", "result_24"):
+            await mirror.ensure(table)
+
+        # 登録名に変換（未登録のメンバーは表示名で扱う）
+        _, id_map = await member_registry.get()
+        names = list(dict.fromkeys(
+            id_map.get(str(m.id), m.display_name) for m in members
+        ))
+
+        embed = discord.Embed(title=f"{hour} 時の編成案", color=0x3498db)
+        for rank, (score, lineup) in enumerate(best_lineups(lineup_stats, names), 1):
+            text = "\n".join(
+                f"・{name} ({lineup_stats.member_games(name)}試合)" for name in lineup
+            )
+            embed.add_field(name=f"案{rank}  評価 {score:.2f}", value=text, inline=True)
+        embed.set_footer(text=f"{len(names)}人から選出")
+
+        await interaction.followup.send(embed=embed)
+
 # スラッシュコマンド登録
 async def setup(bot):
     await bot.add_cog(Handraise(bot))
@@ -1,45 +1,39 @@
 from discord import app_commands
 from discord.ext import commands
 import discord
-from services.supabase import supabase
-import os
-
-# メンバーファイルの場所
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-MEMBER_FILE = os.path.normpath(
-    os.path.join(BASE_DIR, "..", "data", "member.txt")
-)
+import csv
+import hashlib
+import io
+import tempfile
+from datetime import datetime, timedelta
+from services.database import db
+from services.result_mirror import mirror
+from services.members import member_registry
+from services.result_stats import judge, result_stats
+from services.result_export import export_results
+from services.write_queue import write_queue
+from services.enemy_tags import enemy_tags
+from services.rating import ratings, expected
+from services.form import rolling_form
 
 # 日付変換関数
 def format_date(date_str: str) -> str:
     # yyyymmddhh
     return f"{date_str[0:4]}/{date_str[4:6]}/{date_str[6:8]} {date_str[8:10]}"
 
-# メンバー変換関数
-def load_member_data():
-    alias_map = {}      # alias -> 登録名
-    id_map = {}         # discord_id -> 登録名
-
-    with open(MEMBER_FILE, encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith("#"):
-                continue
-
-            name, discord_id, aliases = line.split(":")
-            id_map[discord_id] = name
-
-            for a in aliases.split(","):
-                alias_map[a] = name
-
-    return alias_map, id_map
+# 日時変換関数（yyyymmddhh -> played_at 列の ISO 形式）
+def parse_played_at(date_str: str) -> str:
+    try:
+        return datetime.strptime(date_str, "%Y%m%d%H").isoformat()
+    except ValueError:
+        raise ValueError("date は yyyymmddhh で指定してください")
 
 # メンバー入力解決関数
 async def resolve_members(
     interaction: discord.Interaction,
     member_arg: str
 ) -> list[str]:
-    alias_map, id_map = load_member_data()
+    alias_map, id_map = await member_registry.get()
     result = []
 
     # ロール指定 (@22h など)
@@ -68,8 +62,8 @@ async def resolve_members(
     return result
 
 # メンバー入力解決関数(リザルト表示)
-def resolve_single_member(token: str, interaction):
-    alias_map, id_map = load_member_data()
+async def resolve_single_member(token: str, interaction):
+    alias_map, id_map = await member_registry.get()
 
     # メンション
     if token.startswith("<@"):
@@ -79,13 +73,125 @@ def resolve_single_member(token: str, interaction):
     # エイリアス
     return alias_map.get(token)
 
-# 勝敗判定関数
-def judge(my, enemy):
-    if my > enemy:
-        return "Win"
-    if my < enemy:
-        return "Lose"
-    return "Draw"
+# 6v6の登録行を作る（コマンド引数と同じ形式の入力を検証する）
+async def build_row_12(interaction, enemy: str, scores: str, date: str, member: str):
+    # scores
+    my_score, enemy_score = map(int, scores.split())
+
+    # date
+    formatted_date = format_date(date)
+
+    # members
+    members = await resolve_members(interaction, member)
+
+    return {
+        "player": " ".join(members),
+        "my_score": my_score,
+        "enemy": enemy,
+        "enemy_score": enemy_score,
+        "date": formatted_date,
+        "played_at": parse_played_at(date)
+    }
+
+# 24人戦の登録行を作る
+async def build_row_24(interaction, enemy: str, scores: str, date: str, member: str):
+    # enemy
+    enemies = enemy.split()
+    if len(enemies) != 3:
+        raise ValueError("enemy は3チーム指定してください")
+
+    # scores
+    score_vals = list(map(int, scores.split()))
+    if len(score_vals) != 4:
+        raise ValueError("scores は4つ指定してください")
+
+    my_score = score_vals[0]
+    enemy_scores = score_vals[1:]
+
+    # date
+    formatted_date = format_date(date)
+
+    # members
+    members = await resolve_members(interaction, member)
+
+    # rank 計算
+    rank = calc_rank(my_score, enemy_scores)
+
+    return {
+        "player": " ".join(members),
+        "my_score": my_score,
+        "enemy1": enemies[0],
+        "score1": enemy_scores[0],
+        "enemy2": enemies[1],
+        "score2": enemy_scores[1],
+        "enemy3": enemies[2],
+        "score3": enemy_scores[2],
+        "rank": rank,
+        "date": formatted_date,
+        "played_at": parse_played_at(date)
+    }
+
+# 一括登録の入力を行に分ける（CSV: enemy,scores,date,member）
+def parse_import_rows(text: str, split_semicolon: bool = False):
+    # スラッシュコマンドの文字列は改行できないので、text 指定のときは ; 区切りも受け付ける
+    if split_semicolon:
+        text = text.replace(";", "\n")
+    reader = csv.reader(io.StringIO(text, newline=""))
+
+    rows = []
+    for fields in reader:
+        if not fields or not "".join(fields).strip():
+            continue
+        # ヘッダー行
+        if reader.line_num == 1 and fields[0].strip().lower() == "enemy":
+            continue
+        rows.append((reader.line_num, [f.strip() for f in fields]))
+    return rows
+
+# 一括登録のファイルの読み込み（UTF-8 / Shift_JIS、読めなければ ValueError）
+def decode_import_file(data: bytes) -> str:
+    for encoding in IMPORT_ENCODINGS:
+        try:
+            return data.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    raise ValueError("ファイルの文字コードは UTF-8 か Shift_JIS にしてください")
+
+# 一括登録の行の request_key（同じ内容を再実行しても同じキーになり、二重登録されない）
+def import_request_key(table: str, source_hash: str, line_no: int) -> str:
+    key = f"import:{table}:{source_hash}:{line_no}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+# 期間指定(yyyymmdd)を played_at の範囲に変換（since 以上 until 未満）
+def parse_day_range(since: str | None, until: str | None):
+    def parse_day(day_str):
+        try:
+            return datetime.strptime(day_str, "%Y%m%d")
+        except ValueError:
+            raise ValueError("日付は yyyymmdd で指定してください")
+
+    since_key = parse_day(since).isoformat() if since else None
+    # until はその日を含める（翌日0時未満）
+    until_key = (parse_day(until) + timedelta(days=1)).isoformat() if until else None
+    return since_key, until_key
+
+# 敵チームタグの入力候補
+def enemy_choices(table: str, current: str):
+    return [
+        app_commands.Choice(name=tag, value=tag)
+        for tag in enemy_tags.suggest(table, current.strip())
+    ]
+
+# 24人戦登録の敵チームタグ入力候補（空白区切りの最後のタグを補完する）
+def enemy_choices_24(current: str):
+    head, _, last = current.rpartition(" ")
+    entered = set(head.split())
+    prefix = f"{head} " if head else ""
+    return [
+        app_commands.Choice(name=prefix + tag, value=prefix + tag)
+        for tag in enemy_tags.suggest("result_24", last)
+        if tag not in entered
+    ]
 
 # 順位判定関数
 def calc_rank(my_score, others):
@@ -114,8 +220,17 @@ def get_sorted_teams_24(r):
         reverse=True
     )
 
+# 1ページあたりの表示件数
+PER_PAGE = 20
+# 一括登録の最大件数
+IMPORT_MAX_ROWS = 1000
+# 一括登録のファイルの最大サイズ（バイト）
+IMPORT_MAX_BYTES = 256 * 1024
+# 一括登録のファイルとして受け付ける文字コード（Excel の CSV は Shift_JIS）
+IMPORT_ENCODINGS = ("utf-8-sig", "cp932")
+
 # ページング計算関数
-def calc_pages(data_len: int, per_page: int = 20):
+def calc_pages(data_len: int, per_page: int = PER_PAGE):
     total_pages = (data_len - 1) // per_page + 1
     start_page = total_pages - 1
     return total_pages, start_page
@@ -187,14 +302,15 @@ def build_embed_24(results, page, total_pages):
     )
     return embed
 
-# supabase単一データ取得
-def fetch_by_id(table: str, result_id: int):
+# 直近成績の表示文字列
+def format_form(window):
+    if window is None:
+        return "戦績なし"
+
+    streak = {"Win": "連勝", "Lose": "連敗", "Draw": "連続引き分け"}[window.streak]
     return (
-        supabase.table(table)
-        .select("*")
-        .eq("result_id", result_id)
-        .execute()
-        .data
+        f"直近{window.games}試合 勝率 {window.win_rate * 100:.1f}% "
+        f"平均 {window.avg_margin:+.1f}点 {window.streak_len}{streak}"
     )
 
 # Embed生成関数(詳細)
@@ -209,6 +325,21 @@ def build_result_12_detail_embed(r):
         )
     )
 
+    # 現時点の直近成績
+    embed.add_field(
+        name=f'vs {r["enemy"]}',
+        value=format_form(rolling_form.enemy(r["enemy"])),
+        inline=False
+    )
+    embed.add_field(
+        name="メンバー",
+        value="\n".join(
+            f"{name}: {format_form(rolling_form.member(name))}"
+            for name in dict.fromkeys(r["player"].split())
+        ),
+        inline=False
+    )
+
     embed.set_footer(text=f'result_id : {r["result_id"]}')
     return embed
 
@@ -273,25 +404,100 @@ def build_delete_confirm_24_embed(r):
     embed.set_footer(text=f'result_id : {r["result_id"]}')
     return embed
 
-# ページングビュー
+# 集計の表示文字列(6v6)
+def format_stats_12(counter):
+    total = sum(counter.values())
+    if total == 0:
+        return "戦績なし"
+
+    win, draw, lose = counter["Win"], counter["Draw"], counter["Lose"]
+    return (
+        f"Win {win} / Draw {draw} / Lose {lose}  "
+        f"計 {total}回 勝率 {win / total * 100:.1f}%"
+    )
+
+# 集計の表示文字列(24)
+def format_stats_24(counter):
+    total = sum(counter.values())
+    if total == 0:
+        return "戦績なし"
+
+    ranks = " / ".join(f"{r}位 {counter[r]}" for r in range(1, 5))
+    average = sum(r * n for r, n in counter.items()) / total
+    return f"{ranks}  計 {total}回 平均 {average:.2f}位"
+
+# 集計Embed生成関数
+def build_stats_embed(table, fields):
+    format_func = format_stats_12 if table == "result_12" else format_stats_24
+    title = "6v6 集計" if table == "result_12" else "6v6v6v6 集計"
+
+    embed = discord.Embed(title=title)
+    for name, counter in fields:
+        embed.add_field(name=name, value=format_func(counter), inline=False)
+    return embed
+
+# レーティングEmbed生成関数
+def build_rating_embed(table, rating, limit=10):
+    title = "6v6 レーティング" if table == "result_12" else "6v6v6v6 レーティング"
+    embed = discord.Embed(title=title, description=f"自チーム **{rating.us:.0f}**")
+
+    top = sorted(rating.enemies.items(), key=lambda e: e[1], reverse=True)[:limit]
+    if top:
+        lines = [
+            f"{enemy.ljust(5)} {value:5.0f} ({rating.games[enemy]}試合)"
+            for enemy, value in top
+        ]
+        embed.add_field(
+            name="敵チーム上位", value="```\n" + "\n".join(lines) + "\n```", inline=False
+        )
+
+    months = sorted(rating.history)[-6:]
+    if months:
+        embed.add_field(
+            name="自チームの推移",
+            value="\n".join(f"{m}: {rating.history[m]:.0f}" for m in months),
+            inline=False
+        )
+    return embed
+
+# 対戦成績Embed生成関数
+def build_h2h_embed(table, enemy, rating, counter):
+    format_func = format_stats_12 if table == "result_12" else format_stats_24
+    enemy_rating = rating.rating(enemy)
+
+    embed = discord.Embed(title=f"vs {enemy}", description=format_func(counter))
+    embed.add_field(name="自チーム", value=f"{rating.us:.0f}")
+    embed.add_field(name=enemy, value=f"{enemy_rating:.0f}")
+    embed.add_field(
+        name="期待勝率",
+        value=f"{expected(rating.us, enemy_rating) * 100:.1f}%"
+    )
+    return embed
+
+# ページングビュー（表示したページだけ描画してビュー内で使い回す）
 class PagedResultView(discord.ui.View):
-    def __init__(self, all_results, start_page, build_embed_func):
+    def __init__(self, snapshot, build_embed_func):
         super().__init__(timeout=120)
-        self.all = all_results
-        self.page = start_page
+        self.snapshot = snapshot    # 同じ条件のビュー同士で共有
+        self.total_pages, self.page = calc_pages(len(snapshot))
         self.build_embed = build_embed_func
-
-    def get_page(self):
-        start = self.page * 20
-        return self.all[start:start+20]
+        self.embeds = {}            # ページ番号 -> 描画済みEmbed
+
+    def get_embed(self):
+        embed = self.embeds.get(self.page)
+        if embed is None:
+            start = self.page * PER_PAGE
+            rows = mirror.rows_for(
+                self.snapshot.table,
+                self.snapshot.ids[start:start + PER_PAGE]
+            )
+            embed = self.build_embed(rows, self.page, self.total_pages)
+            self.embeds[self.page] = embed
+        return embed
 
     async def update(self, interaction):
         await interaction.response.edit_message(
-            embed=self.build_embed(
-                self.get_page(),
-                self.page,
-                (len(self.all)-1)//20 + 1
-            ),
+            embed=self.get_embed(),
             view=self
         )
 
@@ -299,13 +505,13 @@ class PagedResultView(discord.ui.View):
     async def prev(self, interaction, button):
         if self.page > 0:
             self.page -= 1
-            await self.update(interaction)
+        await self.update(interaction)
 
     @discord.ui.button(label="▶", style=discord.ButtonStyle.secondary)
     async def next(self, interaction, button):
-        if (self.page+1)*20 < len(self.all):
+        if self.page + 1 < self.total_pages:
             self.page += 1
-            await self.update(interaction)
+        await self.update(interaction)
 
 # 削除時の表示
 class DeleteConfirm12View(discord.ui.View):
@@ -319,9 +525,8 @@ class DeleteConfirm12View(discord.ui.View):
         interaction: discord.Interaction,
         button: discord.ui.Button
     ):
-        supabase.table("result_12").delete().eq(
-            "result_id", self.result_id
-        ).execute()
+        # ジャーナルに残してから非同期で削除する
+        await write_queue.enqueue_delete("result_12", self.result_id)
 
         await interaction.response.edit_message(
             content=f"result_id {self.result_id} を削除しました。",
@@ -353,9 +558,8 @@ class DeleteConfirm24View(discord.ui.View):
         interaction: discord.Interaction,
         button: discord.ui.Button
     ):
-        supabase.table("result_24").delete().eq(
-            "result_id", self.result_id
-        ).execute()
+        # ジャーナルに残してから非同期で削除する
+        await write_queue.enqueue_delete("result_24", self.result_id)
 
         await interaction.response.edit_message(
             content=f"result_id {self.result_id} を削除しました。",
@@ -380,6 +584,20 @@ class ResultRegister(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
 
+    # 起動時に書き込みキューを動かし、ミラーを温めておく
+    # （ミラーは失敗しても初回読み込み時に再同期）
+    async def cog_load(self):
+        write_queue.start()
+        try:
+            await mirror.sync_all(full=True)
+        except Exception as e:
+            print(f"[mirror] 初期同期失敗: {e}")
+        mirror.start()
+
+    async def cog_unload(self):
+        await mirror.stop()
+        await write_queue.stop()
+
     # /register_12
     @app_commands.command(
         name="register_12",
@@ -396,25 +614,113 @@ class ResultRegister(commands.Cog):
         await interaction.response.defer(ephemeral=True)
 
         try:
-            # scores
-            my_score, enemy_score = map(int, scores.split())
+            row = await build_row_12(interaction, enemy, scores, date, member)
+
+            # insert（ジャーナルに残してから非同期で登録する）
+            await write_queue.enqueue_insert("result_12", row)
+
+        except Exception as e:
+            await interaction.followup.send(
+                f"登録失敗: {e}",
+                ephemeral=True
+            )
+            return
 
-            # date
-            formatted_date = format_date(date)
+        await interaction.followup.send(
+            "戦績を登録しました。",
+            ephemeral=True
+        )
 
-            # members
-            members = await resolve_members(interaction, member)
-            player_str = " ".join(members)
+    @register_12.autocomplete("enemy")
+    async def register_12_enemy(self, interaction: discord.Interaction, current: str):
+        return enemy_choices("result_12", current)
 
-            # insert
-            supabase.table("result_12").insert({
-                "player": player_str,
-                "my_score": my_score,
-                "enemy": enemy,
-                "enemy_score": enemy_score,
-                "date": formatted_date
-            }).execute()
+    # /result_import mode:○○ (file:CSV) (text:○○)
+    @app_commands.command(
+        name="result_import",
+        description="戦績をCSV（enemy,scores,date,member）で一括登録します"
+    )
+    @app_commands.choices(mode=[
+        app_commands.Choice(name="6v6", value="result_12"),
+        app_commands.Choice(name="6v6v6v6", value="result_24"),
+    ])
+    async def result_import(
+        self,
+        interaction: discord.Interaction,
+        mode: app_commands.Choice[str],
+        file: discord.Attachment | None = None,
+        text: str | None = None
+    ):
+        await interaction.response.defer(ephemeral=True)
+
+        table = mode.value
+        build_row = build_row_12 if table == "result_12" else build_row_24
+
+        if file is not None:
+            if file.size > IMPORT_MAX_BYTES:
+                await interaction.followup.send(
+                    f"ファイルは {IMPORT_MAX_BYTES // 1024}KB までです。",
+                    ephemeral=True
+                )
+                return
+            try:
+                source = decode_import_file(await file.read())
+            except (discord.HTTPException, ValueError) as e:
+                await interaction.followup.send(
+                    f"ファイルを読み込めません: {e}",
+                    ephemeral=True
+                )
+                return
+        elif text:
+            source = text
+        else:
+            await interaction.followup.send(
+                "file か text を指定してください。",
+                ephemeral=True
+            )
+            return
 
+        lines = parse_import_rows(source, split_semicolon=file is None)
+        if len(lines) > IMPORT_MAX_ROWS:
+            await interaction.followup.send(
+                f"一度に登録できるのは {IMPORT_MAX_ROWS} 件までです。",
+                ephemeral=True
+            )
+            return
+
+        # 全行を検証してから登録（1行でも不正なら何も登録しない）
+        source_hash = hashlib.sha256(source.encode("utf-8")).hexdigest()
+        rows = []
+        errors = []
+        for line_no, fields in lines:
+            try:
+                if len(fields) != 4:
+                    raise ValueError("列数は4つ（enemy,scores,date,member）です")
+                row = await build_row(interaction, *fields)
+                row["request_key"] = import_request_key(table, source_hash, line_no)
+                rows.append(row)
+            except Exception as e:
+                errors.append(f"{line_no}行目: {e}")
+
+        if errors:
+            shown = "\n".join(errors[:20])
+            if len(errors) > 20:
+                shown += f"\n…ほか {len(errors) - 20} 件"
+            await interaction.followup.send(
+                f"登録失敗（{len(errors)} 件のエラー、何も登録していません）\n{shown}",
+                ephemeral=True
+            )
+            return
+
+        if not rows:
+            await interaction.followup.send(
+                "登録する戦績がありません。",
+                ephemeral=True
+            )
+            return
+
+        try:
+            inserted = await db.insert_results(table, rows)
         except Exception as e:
             await interaction.followup.send(
                 f"登録失敗: {e}",
@@ -422,50 +728,115 @@ class ResultRegister(commands.Cog):
             )
             return
 
+        for row in inserted:
+            mirror.add(table, row)
+
         await interaction.followup.send(
-            "戦績を登録しました。",
+            f"{len(inserted)} 件の戦績を登録しました。",
             ephemeral=True
         )
 
-    # /result_12 (member:○○) (enemy:○○)
+    # /result_export mode:○○ (fmt:csv/json) (member:○○) (enemy:○○) (since:yyyymmdd) (until:yyyymmdd)
+    @app_commands.command(
+        name="result_export",
+        description="戦績を圧縮CSV/JSONファイルで出力します"
+    )
+    @app_commands.choices(
+        mode=[
+            app_commands.Choice(name="6v6", value="result_12"),
+            app_commands.Choice(name="6v6v6v6", value="result_24"),
+        ],
+        fmt=[
+            app_commands.Choice(name="CSV", value="csv"),
+            app_commands.Choice(name="JSON", value="json"),
+        ]
+    )
+    async def result_export(
+        self,
+        interaction: discord.Interaction,
+        mode: app_commands.Choice[str],
+        fmt: app_commands.Choice[str] | None = None,
+        member: str | None = None,
+        enemy: str | None = None,
+        since: str | None = None,
+        until: str | None = None
+    ):
+        await interaction.response.defer()
+
+        table = mode.value
+        ext = fmt.value if fmt else "csv"
+
+        name = None
+        if member:
+            name = await resolve_single_member(member, interaction)
+            if not name:
+                await interaction.followup.send("メンバーが見つかりません")
+                return
+
+        try:
+            since_key, until_key = parse_day_range(since, until)
+        except ValueError as e:
+            await interaction.followup.send(str(e))
+            return
+
+        # 一時ファイルにページ単位で書き出すのでメモリは件数によらず一定
+        with tempfile.TemporaryFile() as f:
+            count = await export_results(
+                db, f, table, ext,
+                member=name, enemy=enemy, since=since_key, until=until_key
+            )
+            if count == 0:
+                await interaction.followup.send("該当する戦績がありません")
+                return
+
+            await interaction.followup.send(
+                f"{count} 件を出力しました。",
+                file=discord.File(f, filename=f"{table}.{ext}.gz")
+            )
+
+    # /result_12 (member:○○) (enemy:○○) (since:yyyymmdd) (until:yyyymmdd)
     @app_commands.command(name="result_12")
     async def result_12(
         self,
         interaction: discord.Interaction,
         member: str | None = None,
-        enemy: str | None = None
+        enemy: str | None = None,
+        since: str | None = None,
+        until: str | None = None
     ):
         await interaction.response.defer()
 
-        data = (
-            supabase.table("result_12")
-            .select("*")
-            .order("result_id")
-            .execute()
-            .data
-        )
-
         # フィルタ
+        name = None
         if member:
-            name = resolve_single_member(member, interaction)
+            name = await resolve_single_member(member, interaction)
             if not name:
                 await interaction.followup.send("メンバーが見つかりません")
                 return
-            data = [r for r in data if name in r["player"].split()]
 
-        if enemy:
-            data = [r for r in data if r["enemy"] == enemy]
+        # 期間フィルタ
+        try:
+            since_key, until_key = parse_day_range(since, until)
+        except ValueError as e:
+            await interaction.followup.send(str(e))
+            return
 
-        if not data:
+        filters = {
+            "member": name, "enemy": enemy,
+            "since": since_key, "until": until_key,
+        }
+        snapshot = await mirror.snapshot("result_12", **filters)
+        if len(snapshot) == 0:
             await interaction.followup.send("該当する戦績がありません")
             return
 
-        total_pages, start_page = calc_pages(len(data))
+        view = PagedResultView(snapshot, build_embed_12)
 
-        view = PagedResultView(data, start_page, build_embed_12)
-        embed = build_embed_12(view.get_page(), start_page, total_pages)
+        await interaction.followup.send(embed=view.get_embed(), view=view)
 
-        await interaction.followup.send(embed=embed, view=view)
+    @result_12.autocomplete("enemy")
+    async def result_12_enemy(self, interaction: discord.Interaction, current: str):
+        return enemy_choices("result_12", current)
 
     # result_12_detail id:○○
     @app_commands.command(
@@ -479,16 +850,16 @@ class ResultRegister(commands.Cog):
     ):
         await interaction.response.defer()
 
-        res = fetch_by_id("result_12", id)
+        res = await mirror.fetch_result("result_12", id)
 
-        if not res:
+        if res is None:
             await interaction.followup.send(
                 "指定された result_id は存在しません。",
                 ephemeral=True
             )
             return
 
-        embed = build_result_12_detail_embed(res[0])
+        embed = build_result_12_detail_embed(res)
         await interaction.followup.send(embed=embed)
 
     # result_12_delete
@@ -503,16 +874,16 @@ class ResultRegister(commands.Cog):
     ):
         await interaction.response.defer(ephemeral=True)
 
-        res = fetch_by_id("result_12", id)
+        res = await mirror.fetch_result("result_12", id)
 
-        if not res:
+        if res is None:
             await interaction.followup.send(
                 "指定された result_id は存在しません。",
                 ephemeral=True
             )
             return
 
-        embed = build_delete_confirm_12_embed(res[0])
+        embed = build_delete_confirm_12_embed(res)
         view = DeleteConfirm12View(id)
 
         await interaction.followup.send(
@@ -537,42 +908,11 @@ class ResultRegister(commands.Cog):
         await interaction.response.defer(ephemeral=True)
 
         try:
-            # enemy
-            enemies = enemy.split()
-            if len(enemies) != 3:
-                raise ValueError("enemy は3チーム指定してください")
-
-            # scores
-            score_vals = list(map(int, scores.split()))
-            if len(score_vals) != 4:
-                raise ValueError("scores は4つ指定してください")
-
-            my_score = score_vals[0]
-            enemy_scores = score_vals[1:]
-
-            # date
-            formatted_date = format_date(date)
-
-            # members
-            members = await resolve_members(interaction, member)
-            player_str = " ".join(members)
-
-            # rank 計算
-            rank = calc_rank(my_score, enemy_scores)
-
-            # insert
-            supabase.table("result_24").insert({
-                "player": player_str,
-                "my_score": my_score,
-                "enemy1": enemies[0],
-                "score1": enemy_scores[0],
-                "enemy2": enemies[1],
-                "score2": enemy_scores[1],
-                "enemy3": enemies[2],
-                "score3": enemy_scores[2],
-                "rank": rank,
-                "date": formatted_date
-            }).execute()
+            row = await build_row_24(interaction, enemy, scores, date, member)
+            rank = row["rank"]
+
+            # insert（ジャーナルに残してから非同期で登録する）
+            await write_queue.enqueue_insert("result_24", row)
 
         except Exception as e:
             await interaction.followup.send(
@@ -586,49 +926,54 @@ class ResultRegister(commands.Cog):
             ephemeral=True
         )
 
-    # /result_24 (member:○○ enemy:○○)
+    @register_24.autocomplete("enemy")
+    async def register_24_enemy(self, interaction: discord.Interaction, current: str):
+        return enemy_choices_24(current)
+
+    # /result_24 (member:○○ enemy:○○) (since:yyyymmdd) (until:yyyymmdd)
     @app_commands.command(name="result_24")
     async def result_24(
         self,
         interaction: discord.Interaction,
         member: str | None = None,
-        enemy: str | None = None
+        enemy: str | None = None,
+        since: str | None = None,
+        until: str | None = None
     ):
         await interaction.response.defer()
 
-        data = (
-            supabase.table("result_24")
-            .select("*")
-            .order("result_id")
-            .execute()
-            .data
-        )
-
         # member フィルタ
+        name = None
         if member:
-            name = resolve_single_member(member, interaction)
+            name = await resolve_single_member(member, interaction)
             if not name:
                 await interaction.followup.send("メンバーが見つかりません")
                 return
-            data = [r for r in data if name in r["player"].split()]
 
-        # enemy フィルタ（3チームのどれかに一致）
-        if enemy:
-            data = [
-                r for r in data
-                if enemy in (r["enemy1"], r["enemy2"], r["enemy3"])
-            ]
+        # 期間フィルタ
+        try:
+            since_key, until_key = parse_day_range(since, until)
+        except ValueError as e:
+            await interaction.followup.send(str(e))
+            return
 
-        if not data:
+        # enemy フィルタ（3チームのどれかに一致）はクエリ側で行う
+        filters = {
+            "member": name, "enemy": enemy,
+            "since": since_key, "until": until_key,
+        }
+        snapshot = await mirror.snapshot("result_24", **filters)
+        if len(snapshot) == 0:
             await interaction.followup.send("該当する戦績がありません")
             return
 
-        total_pages, start_page = calc_pages(len(data))
+        view = PagedResultView(snapshot, build_embed_24)
 
-        view = PagedResultView(data, start_page, build_embed_24)
-        embed = build_embed_24(view.get_page(), start_page, total_pages)
+        await interaction.followup.send(embed=view.get_embed(), view=view)
 
-        await interaction.followup.send(embed=embed, view=view)
+    @result_24.autocomplete("enemy")
+    async def result_24_enemy(self, interaction: discord.Interaction, current: str):
+        return enemy_choices("result_24", current)
 
     # /result_24_detail id:○○
     @app_commands.command(
@@ -642,16 +987,16 @@ class ResultRegister(commands.Cog):
     ):
         await interaction.response.defer()
 
-        res = fetch_by_id("result_24", id)
+        res = await mirror.fetch_result("result_24", id)
 
-        if not res:
+        if res is None:
             await interaction.followup.send(
                 "指定された result_id は存在しません。",
                 ephemeral=True
             )
             return
 
-        embed = build_result_24_detail_embed(res[0])
+        embed = build_result_24_detail_embed(res)
         await interaction.followup.send(embed=embed)
 
     # /result_24_delete id:○○
@@ -666,16 +1011,16 @@ class ResultRegister(commands.Cog):
     ):
         await interaction.response.defer(ephemeral=True)
 
-        res = fetch_by_id("result_24", id)
+        res = await mirror.fetch_result("result_24", id)
 
-        if not res:
+        if res is None:
             await interaction.followup.send(
                 "指定された result_id は存在しません。",
                 ephemeral=True
             )
             return
 
-        embed = build_delete_confirm_24_embed(res[0])
+        embed = build_delete_confirm_24_embed(res)
         view = DeleteConfirm24View(id)
 
         await interaction.followup.send(
@@ -684,6 +1029,154 @@ class ResultRegister(commands.Cog):
             ephemeral=True
         )
 
+    # /stats mode:○○ (member:○○) (enemy:○○) (month:yyyymm)
+    @app_commands.command(
+        name="stats",
+        description="戦績の集計を表示します"
+    )
+    @app_commands.choices(mode=[
+        app_commands.Choice(name="6v6", value="result_12"),
+        app_commands.Choice(name="6v6v6v6", value="result_24"),
+    ])
+    async def stats(
+        self,
+        interaction: discord.Interaction,
+        mode: app_commands.Choice[str],
+        member: str | None = None,
+        enemy: str | None = None,
+        month: str | None = None
+    ):
+        await interaction.response.defer()
+
+        table = mode.value
+        await mirror.ensure(table)
+
+        fields = []
+        if member:
+            name = await resolve_single_member(member, interaction)
+            if not name:
+                await interaction.followup.send("メンバーが見つかりません")
+                return
+            fields.append((f"メンバー {name}", result_stats.member(table, name)))
+
+        if enemy:
+            fields.append((f"敵 {enemy}", result_stats.enemy(table, enemy)))
+
+        if month:
+            # yyyymm -> yyyy/mm
+            key = f"{month[0:4]}/{month[4:6]}"
+            fields.append((key, result_stats.month(table, key)))
+
+        # 指定なしなら全体と直近6か月
+        if not fields:
+            fields.append(("全体", result_stats.total(table)))
+            for key in result_stats.months(table)[-6:]:
+                fields.append((key, result_stats.month(table, key)))
+
+        await interaction.followup.send(embed=build_stats_embed(table, fields))
+
+    # /rating mode:○○
+    @app_commands.command(
+        name="rating",
+        description="自チームと敵チームのレーティングを表示します"
+    )
+    @app_commands.choices(mode=[
+        app_commands.Choice(name="6v6", value="result_12"),
+        app_commands.Choice(name="6v6v6v6", value="result_24"),
+    ])
+    async def rating(
+        self,
+        interaction: discord.Interaction,
+        mode: app_commands.Choice[str]
+    ):
+        await interaction.response.defer()
+
+        table = mode.value
+        await mirror.ensure(table)
+
+        await interaction.followup.send(
+            embed=build_rating_embed(table, ratings.get(table))
+        )
+
+    # /h2h mode:○○ enemy:○○
+    @app_commands.command(
+        name="h2h",
+        description="敵チームとの対戦成績とレーティングを表示します"
+    )
+    @app_commands.choices(mode=[
+        app_commands.Choice(name="6v6", value="result_12"),
+        app_commands.Choice(name="6v6v6v6", value="result_24"),
+    ])
+    async def h2h(
+        self,
+        interaction: discord.Interaction,
+        mode: app_commands.Choice[str],
+        enemy: str
+    ):
+        await interaction.response.defer()
+
+        table = mode.value
+        await mirror.ensure(table)
+
+        counter = result_stats.enemy(table, enemy)
+        if not counter:
+            await interaction.followup.send("該当する戦績がありません")
+            return
+
+        await interaction.followup.send(
+            embed=build_h2h_embed(table, enemy, ratings.get(table), counter)
+        )
+
+    @h2h.autocomplete("enemy")
+    async def h2h_enemy(self, interaction: discord.Interaction, current: str):
+        # mode 未選択なら 6v6 の候補を出す
+        table = interaction.namespace.mode or "result_12"
+        return enemy_choices(table, current)
+
+    # /form (member:○○) (enemy:○○)
+    @app_commands.command(
+        name="form",
+        description="6v6の直近の勝率・連勝・平均点差を表示します"
+    )
+    async def form(
+        self,
+        interaction: discord.Interaction,
+        member: str | None = None,
+        enemy: str | None = None
+    ):
+        await interaction.response.defer()
+
+        if not member and not enemy:
+            await interaction.followup.send("member か enemy を指定してください")
+            return
+
+        await mirror.ensure("result_12")
+
+        embed = discord.Embed(title="6v6 直近成績")
+        if member:
+            name = await resolve_single_member(member, interaction)
+            if not name:
+                await interaction.followup.send("メンバーが見つかりません")
+                return
+            embed.add_field(
+                name=f"メンバー {name}",
+                value=format_form(rolling_form.member(name)),
+                inline=False
+            )
+
+        if enemy:
+            embed.add_field(
+                name=f"vs {enemy}",
+                value=format_form(rolling_form.enemy(enemy)),
+                inline=False
+            )
+
+        await interaction.followup.send(embed=embed)
+
+    @form.autocomplete("enemy")
+    async def form_enemy(self, interaction: discord.Interaction, current: str):
+        return enemy_choices("result_12", current)
+
 
 
 # スラッシュコマンド登録
@@ -3,7 +3,7 @@ from discord.ext import commands
 from discord import app_commands
 import asyncio
 import statistics
-from services.supabase import supabase
+from services.database import db
 
 from services.lounge_api import fetch_mmr
 from services.lounge_api import fetch_peak
@@ -105,13 +105,7 @@ class Player(commands.Cog):
 
         try:
             # upsert（既にあれば更新、なければ追加）
-            supabase.table("user_vr").upsert(
-                {
-                    "user_id": user_id,
-                    "vr": vr
-                },
-                on_conflict="user_id"
-            ).execute()
+            await db.upsert_vr(user_id, vr)
 
             await interaction.response.send_message(
                 f"✅ VRを **{vr}** で登録しました。",
@@ -138,18 +132,12 @@ class Player(commands.Cog):
         user_id = target.id
 
         try:
-            result = (
-                supabase
-                .table("user_vr")
-                .select("vr")
-                .eq("user_id", user_id)
-                .single()
-                .execute()
-            )
-
-            vr_value = result.data["vr"]
+            vr_value = await db.fetch_vr(user_id)
+        except Exception as e:
+            vr_value = None
+            print(f"[vr] db error: {e}")
 
-        except Exception:
+        if vr_value is None:
             await interaction.response.send_message(
                 f"{target.display_name} のVRは登録されていません。",
                 ephemeral=True
@@ -184,21 +172,15 @@ class Player(commands.Cog):
         user_ids = [m.id for m in members]
 
         try:
-            result = (
-                supabase
-                .table("user_vr")
-                .select("user_id, vr")
-                .in_("user_id", user_ids)
-                .execute()
-            )
+            rows = await db.fetch_vrs(user_ids)
         except Exception as e:
             await interaction.followup.send("VRデータの取得に失敗しました。")
-            print(f"[avevr] supabase error: {e}")
+            print(f"[avevr] db error: {e}")
             return
 
         vr_map = {
             row["user_id"]: int(row["vr"])
-            for row in result.data
+            for row in rows
             if row["vr"].isdigit()
         }
 
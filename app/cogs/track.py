@@ -3,26 +3,76 @@ from discord import app_commands
 from discord.ext import commands
 import os
 import json
-import jaconv
+import asyncio
+from services.track_index import (
+    TrackData, build_track_data, normalize,
+    connect_entry_error, track_entry_error, valid_entries,
+    validate_connects, validate_tracks,
+)
+from services.data_bundle import check_integrity, load_bundle
 
 TRACK_FILE = os.path.join(os.path.dirname(__file__), "..", "data", "track.json")
 CONNECT_FILE = os.path.join(os.path.dirname(__file__), "..", "data", "track_connect.json")
 NUMBER_EMOJIS = ["1️⃣", "2️⃣", "3️⃣", "4️⃣", "5️⃣", "6️⃣", "7️⃣", "8️⃣", "9️⃣", "🔟"]
 
+# 1ページに出す接続の数（番号の絵文字は 1〜10 まで）
+CONNECTS_PER_PAGE = len(NUMBER_EMOJIS)
+
 class ConnectView(discord.ui.View):
-    def __init__(self, connects, end_name):
+    def __init__(self, connects, title, field):
         super().__init__(timeout=180)
         self.connects = connects
-        self.end_name = end_name
+        self.title = title
+        self.field = field      # 一覧に出す相手側のコース（"start" / "end"）
+        self.page = 0
+        self.pages = (len(connects) - 1) // CONNECTS_PER_PAGE + 1
+        self.render()
+
+    def render(self):
+        """今のページの番号ボタンとページ送りを並べ直す"""
+        self.clear_items()
+        offset = self.page * CONNECTS_PER_PAGE
+        for i in range(offset, min(offset + CONNECTS_PER_PAGE, len(self.connects))):
+            self.add_item(ConnectButton(i, NUMBER_EMOJIS[i - offset]))
+        if self.pages > 1:
+            self.add_item(ConnectPageButton(-1, "◀", self.page == 0))
+            self.add_item(ConnectPageButton(1, "▶", self.page == self.pages - 1))
+
+    def embed(self) -> discord.Embed:
+        offset = self.page * CONNECTS_PER_PAGE
+        page = self.connects[offset:offset + CONNECTS_PER_PAGE]
+        lines = [f"{NUMBER_EMOJIS[i]} {c[self.field]}" for i, c in enumerate(page)]
+
+        embed = discord.Embed(
+            title=self.title,
+            description="\n".join(lines),
+            color=0x1abc9c
+        )
+        if self.pages > 1:
+            embed.set_footer(text=f"{self.page + 1} / {self.pages} ページ（全 {len(self.connects)} 件）")
+        return embed
+
+class ConnectPageButton(discord.ui.Button):
+    def __init__(self, step: int, label: str, disabled: bool):
+        super().__init__(
+            style=discord.ButtonStyle.secondary,
+            label=label,
+            disabled=disabled,
+            row=2
+        )
+        self.step = step
 
-        for i, _ in enumerate(connects):
-            self.add_item(ConnectButton(i))
+    async def callback(self, interaction: discord.Interaction):
+        view: ConnectView = self.view
+        view.page += self.step
+        view.render()
+        await interaction.response.edit_message(embed=view.embed(), view=view)
 
 class ConnectButton(discord.ui.Button):
-    def __init__(self, index: int):
+    def __init__(self, index: int, emoji: str):
         super().__init__(
             style=discord.ButtonStyle.primary,
-            emoji=f"{index}\N{COMBINING ENCLOSING KEYCAP}"
+            emoji=emoji
         )
         self.index = index
 
@@ -56,109 +106,218 @@ class ConnectButton(discord.ui.Button):
 class Track(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.track_dict = {}
-        self.load_tracks()
-        self.connects = []
-        self.load_connects()
+        # コマンドは開始時に self.data を1回だけ読むので、
+        # 読み直しは新しい TrackData への差し替えだけで済む
+        try:
+            self.data = self.load_data()
+        except ValueError as e:
+            print(f"コースデータエラー: {e}")
+            self.data = build_track_data([], [])
 
 
     def normalize(self, s: str) -> str:
         """入力文字列を小文字・カタカナ統一・全角半角吸収"""
-        s = s.strip().lower()            # 前後スペース除去＆小文字化
-        s = jaconv.hira2kata(s)          # ひらがな → カタカナ
-        s = jaconv.z2h(s, kana=False, digit=True, ascii=True)  # 全角数字・英字 → 半角
-        return s
-
-    def load_tracks(self):
-        """track.json を読み込み、alias -> (name, image_url) の辞書にする"""
-        self.track_dict = {}
-        if not os.path.exists(TRACK_FILE):
-            print(f"track.json が見つかりません: {TRACK_FILE}")
-            return
-        
-        with open(TRACK_FILE, "r", encoding="utf-8") as f:
-            try:
-                data = json.load(f)
-            except json.JSONDecodeError as e:
-                print(f"JSON 読み込みエラー: {e}")
-                return
+        return normalize(s)
 
-        for entry in data:
-            name = entry.get("name")
-            image_url = entry.get("image")
-            aliases = entry.get("aliases", [])
-            for alias in aliases:
-                normalized_alias = self.normalize(alias)
-                self.track_dict[normalized_alias] = (name, image_url)
-                print(f"登録: {normalized_alias} -> {name}")  # 確認用
-
-    def load_connects(self):
-        self.connects = []
-        if not os.path.exists(CONNECT_FILE):
-            print("track_connect.json が見つかりません")
-            return
+    def not_found_message(self, data: TrackData, name: str, normalized: str) -> str:
+        """見つからなかったときの返答（近いコース名があれば候補として出す）"""
+        message = f"コース「{name}」は見つかりませんでした。"
+        candidates = data.fuzzy.search(normalized)
+        if candidates:
+            message += "\nもしかして: " + " / ".join(n for n, _ in candidates)
+        return message
+
+    def read_json(self, path: str, strict: bool):
+        """JSON の読み込み（strict でなければ失敗時は空リスト）"""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            if strict:
+                raise ValueError(f"{os.path.basename(path)}: {e}")
+            print(f"JSON 読み込みエラー: {e}")
+            return []
+
+    def load_data(self, strict: bool = False) -> TrackData:
+        """検索用データ一式の読み込み（最新のバンドルがなければ JSON から作る）"""
+        bundle = load_bundle()
+        if bundle is not None:
+            data = bundle["tracks"]
+            print(f"[track] バンドル v{bundle['version']} を読み込みました")
+            return data
+
+        tracks = self.read_json(TRACK_FILE, strict)
+        connects = self.read_json(CONNECT_FILE, strict)
+        # 起動時は不正な件だけ除いて読み込み、/reload_data では1件でも不正なら差し替えない
+        if strict:
+            validate_tracks(tracks)
+            validate_connects(connects)
+        else:
+            tracks = valid_entries(tracks, "track.json", track_entry_error)
+            connects = valid_entries(connects, "track_connect.json", connect_entry_error)
+
+        # 参照整合性もバンドル作成時と同じ基準で確認する
+        errors = check_integrity(tracks, connects)
+        if errors and strict:
+            raise ValueError("\n".join(errors))
+        for error in errors:
+            print(f"[track] 警告: {error}")
+
+        data = build_track_data(tracks, connects)
+        print(f"[track] 別名 {len(data.track_dict)} / 接続 {len(data.connects)}")
+        return data
 
-        with open(CONNECT_FILE, "r", encoding="utf-8") as f:
-            try:
-                self.connects = json.load(f)
-            except json.JSONDecodeError as e:
-                print(f"connect JSON エラー: {e}")
+    async def reload_data(self) -> TrackData:
+        """別スレッドで読み直して検証し、通ったものに差し替える"""
+        data = await asyncio.to_thread(self.load_data, True)
+        self.data = data
+        return data
+
+    async def name_autocomplete(self, interaction: discord.Interaction, current: str):
+        """コース名の入力補完（候補はコース名で返す）"""
+        return [
+            app_commands.Choice(name=name, value=name)
+            for name in self.data.trie.complete(self.normalize(current))
+        ]
 
     # /track name:○○
     @app_commands.command(name="track")
     async def track(self, interaction: discord.Interaction, name: str):
         """指定コースの情報を表示"""
+        data = self.data
         normalized_name = self.normalize(name)
-        if normalized_name not in self.track_dict:
+        if normalized_name not in data.track_dict:
             await interaction.response.send_message(
-                f"コース「{name}」は見つかりませんでした。", ephemeral=True
+                self.not_found_message(data, name, normalized_name), ephemeral=True
             )
             return
 
-        track_name, image_url = self.track_dict[normalized_name]
+        track_name, image_url = data.track_dict[normalized_name]
         embed = discord.Embed(title=track_name, color=0x1abc9c)
         embed.set_image(url=image_url)
         await interaction.response.send_message(embed=embed)
 
-    # /ctrack name:○○
-    @app_commands.command(name="ctrack")
-    async def ctrack(self, interaction: discord.Interaction, name: str):
-        normalized = self.normalize(name)
+    @track.autocomplete("name")
+    async def track_name_autocomplete(self, interaction: discord.Interaction, current: str):
+        return await self.name_autocomplete(interaction, current)
 
-        if normalized not in self.track_dict:
+    # /ctrack (name:○○) (from:○○)
+    @app_commands.command(name="ctrack")
+    @app_commands.rename(from_="from")
+    async def ctrack(
+        self,
+        interaction: discord.Interaction,
+        name: str | None = None,
+        from_: str | None = None
+    ):
+        """name を終点、from を始点とする接続を表示"""
+        if not name and not from_:
             await interaction.response.send_message(
-                f"コース「{name}」は見つかりませんでした。",
-                ephemeral=True
+                "name か from を指定してください。", ephemeral=True
             )
             return
 
-        end_name, _ = self.track_dict[normalized]
+        data = self.data
 
-        # 終点が一致する接続を集める
-        matched = [
-            c for c in self.connects
-            if self.normalize(c["end"]) == self.normalize(end_name)
-        ]
+        # コース名の解決
+        resolved = {}
+        for key, value in (("end", name), ("start", from_)):
+            if not value:
+                continue
+            normalized = self.normalize(value)
+            if normalized not in data.track_dict:
+                await interaction.response.send_message(
+                    self.not_found_message(data, value, normalized),
+                    ephemeral=True
+                )
+                return
+            resolved[key], _ = data.track_dict[normalized]
+
+        end_name = resolved.get("end")
+        start_name = resolved.get("start")
+
+        # 終点・始点の索引から接続を引く
+        if end_name:
+            matched = data.connects_by_end.get(self.normalize(end_name), [])
+            if start_name:
+                key = self.normalize(start_name)
+                matched = [c for c in matched if self.normalize(c["start"]) == key]
+        else:
+            matched = data.connects_by_start.get(self.normalize(start_name), [])
 
         if not matched:
+            if end_name and start_name:
+                message = f"「{start_name}」から「{end_name}」への接続は見つかりません。"
+            elif end_name:
+                message = f"「{end_name}」を終点とする接続は見つかりません。"
+            else:
+                message = f"「{start_name}」を始点とする接続は見つかりません。"
+            await interaction.response.send_message(message, ephemeral=True)
+            return
+
+        if end_name and start_name:
+            title = f'「{start_name}」→「{end_name}」'
+        elif end_name:
+            title = f'終点「{end_name}」'
+        else:
+            title = f'始点「{start_name}」'
+
+        view = ConnectView(matched, title, "start" if end_name else "end")
+        await interaction.response.send_message(embed=view.embed(), view=view)
+
+    @ctrack.autocomplete("name")
+    async def ctrack_name_autocomplete(self, interaction: discord.Interaction, current: str):
+        return await self.name_autocomplete(interaction, current)
+
+    @ctrack.autocomplete("from_")
+    async def ctrack_from_autocomplete(self, interaction: discord.Interaction, current: str):
+        return await self.name_autocomplete(interaction, current)
+
+    # /route from:○○ to:○○
+    @app_commands.command(name="route")
+    @app_commands.rename(from_="from")
+    async def route(self, interaction: discord.Interaction, from_: str, to: str):
+        """from から to までの接続の並びを表示"""
+        data = self.data
+        names = []
+        for value in (from_, to):
+            normalized = self.normalize(value)
+            if normalized not in data.track_dict:
+                await interaction.response.send_message(
+                    self.not_found_message(data, value, normalized),
+                    ephemeral=True
+                )
+                return
+            names.append(data.track_dict[normalized][0])
+        start_name, end_name = names
+
+        path = data.routes.route(self.normalize(start_name), self.normalize(end_name))
+        if not path:
             await interaction.response.send_message(
-                f"「{end_name}」を終点とする接続は見つかりません。",
+                f"「{start_name}」から「{end_name}」への経路は見つかりません。",
                 ephemeral=True
             )
             return
 
         lines = []
-        for i, c in enumerate(matched):
-            lines.append(f"{i}️⃣ {c['start']}")
-
+        for c in path:
+            lines.append(f"{c['start']} → {c['end']}")
+            if c.get("description"):
+                lines.append(f"　{c['description']}")
         embed = discord.Embed(
-            title=f'終点「{end_name}」',
+            title=f"「{start_name}」→「{end_name}」（{len(path)}接続）",
             description="\n".join(lines),
             color=0x1abc9c
         )
+        await interaction.response.send_message(embed=embed)
+
+    @route.autocomplete("from_")
+    async def route_from_autocomplete(self, interaction: discord.Interaction, current: str):
+        return await self.name_autocomplete(interaction, current)
 
-        view = ConnectView(matched, end_name)
-        await interaction.response.send_message(embed=embed, view=view)
+    @route.autocomplete("to")
+    async def route_to_autocomplete(self, interaction: discord.Interaction, current: str):
+        return await self.name_autocomplete(interaction, current)
 
 async def setup(bot):
     await bot.add_cog(Track(bot))
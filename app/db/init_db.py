@@ -4,43 +4,128 @@ import os
 # dbファイルのパス（result.db）
 db_path = os.path.join(os.path.dirname(__file__), "result.db")
 
-conn = sqlite3.connect(db_path)
-cursor = conn.cursor()
-
-cursor.execute("DROP TABLE IF EXISTS result_a;")
-cursor.execute("DROP TABLE IF EXISTS result_b;")
-
-# result_a テーブル（4team戦：敵3チーム）
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS result_a (
+# Supabase 側の result_12 / result_24 / user_vr と同じ構成
+SCHEMA = """
+-- result_12 テーブル（6v6：敵1チーム）
+CREATE TABLE IF NOT EXISTS result_12 (
     result_id INTEGER PRIMARY KEY AUTOINCREMENT,
-    player TEXT,
-    my_point INTEGER NOT NULL,
-    enemy1 TEXT,
-    point1 INTEGER,
-    enemy2 TEXT,
-    point2 INTEGER,
-    enemy3 TEXT,
-    point3 INTEGER,
-    rank INTEGER,
-    date TEXT
+    player TEXT NOT NULL,
+    my_score INTEGER NOT NULL,
+    enemy TEXT NOT NULL,
+    enemy_score INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    played_at TEXT,
+    request_key TEXT
 );
-""")
 
-# result_b テーブル（2team戦：敵1チーム）
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS result_b (
+-- result_24 テーブル（6v6v6v6：敵3チーム）
+CREATE TABLE IF NOT EXISTS result_24 (
     result_id INTEGER PRIMARY KEY AUTOINCREMENT,
-    player TEXT,
-    my_point INTEGER NOT NULL,
-    enemy TEXT,
-    enemy_point INTEGER,
-    rank INTEGER,
-    date TEXT
+    player TEXT NOT NULL,
+    my_score INTEGER NOT NULL,
+    enemy1 TEXT NOT NULL,
+    score1 INTEGER NOT NULL,
+    enemy2 TEXT NOT NULL,
+    score2 INTEGER NOT NULL,
+    enemy3 TEXT NOT NULL,
+    score3 INTEGER NOT NULL,
+    rank INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    played_at TEXT,
+    request_key TEXT
+);
+
+-- VR テーブル
+CREATE TABLE IF NOT EXISTS user_vr (
+    user_id INTEGER PRIMARY KEY,
+    vr TEXT NOT NULL
+);
+
+-- メンバーテーブル（member.txt と同じ内容、aliases はカンマ区切り）
+CREATE TABLE IF NOT EXISTS member (
+    name TEXT PRIMARY KEY,
+    discord_id TEXT NOT NULL,
+    aliases TEXT NOT NULL
+);
+
+-- 出場メンバーテーブル（player を1人1行に展開したもの）
+CREATE TABLE IF NOT EXISTS result_player (
+    result_table TEXT NOT NULL,
+    result_id INTEGER NOT NULL,
+    member TEXT NOT NULL,
+    PRIMARY KEY (result_table, result_id, member)
 );
-""")
 
-conn.commit()
-conn.close()
+-- member フィルタ用インデックス
+CREATE INDEX IF NOT EXISTS idx_result_player_member
+    ON result_player (result_table, member, result_id);
+
+-- enemy フィルタ用インデックス
+CREATE INDEX IF NOT EXISTS idx_result_12_enemy ON result_12 (enemy);
+CREATE INDEX IF NOT EXISTS idx_result_24_enemy1 ON result_24 (enemy1);
+CREATE INDEX IF NOT EXISTS idx_result_24_enemy2 ON result_24 (enemy2);
+CREATE INDEX IF NOT EXISTS idx_result_24_enemy3 ON result_24 (enemy3);
+"""
+
+# 後から追加した列のインデックス（列の追加後に作る）
+TIME_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_result_12_played_at ON result_12 (played_at);
+CREATE INDEX IF NOT EXISTS idx_result_24_played_at ON result_24 (played_at);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_result_12_request_key ON result_12 (request_key);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_result_24_request_key ON result_24 (request_key);
+"""
+
+# played_at 列がなければ追加し、date("yyyy/mm/dd hh") から埋める
+def backfill_played_at(conn: sqlite3.Connection):
+    for table in ("result_12", "result_24"):
+        columns = [r[1] for r in conn.execute(f"PRAGMA table_info({table})")]
+        if "played_at" not in columns:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN played_at TEXT")
+        if "request_key" not in columns:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN request_key TEXT")
+
+        conn.execute(
+            f"UPDATE {table} SET played_at = "
+            "replace(substr(date, 1, 10), '/', '-') || 'T' || substr(date, 12, 2) || ':00:00' "
+            "WHERE played_at IS NULL"
+        )
+    conn.commit()
+
+# result_player が空なら既存の player 文字列から作る（初回のみ）
+def backfill_result_player(conn: sqlite3.Connection):
+    if conn.execute("SELECT 1 FROM result_player LIMIT 1").fetchone():
+        return
+
+    for table in ("result_12", "result_24"):
+        rows = conn.execute(f"SELECT result_id, player FROM {table}").fetchall()
+        conn.executemany(
+            "INSERT OR IGNORE INTO result_player (result_table, result_id, member) "
+            "VALUES (?, ?, ?)",
+            [
+                (table, result_id, member)
+                for result_id, player in rows
+                for member in player.split()
+            ]
+        )
+    conn.commit()
+
+# テーブル・インデックス作成（既存データは残す）
+def init_schema(conn: sqlite3.Connection):
+    conn.executescript(SCHEMA)
+    conn.commit()
+    backfill_played_at(conn)
+    conn.executescript(TIME_INDEXES)
+    backfill_result_player(conn)
+
+
+if __name__ == "__main__":
+    conn = sqlite3.connect(db_path)
+
+    # 旧スキーマのテーブルは削除
+    conn.execute("DROP TABLE IF EXISTS result_a;")
+    conn.execute("DROP TABLE IF EXISTS result_b;")
+
+    init_schema(conn)
+    conn.close()
 
-print(f"✅ データベース初期化完了: {db_path}")
+    print(f"✅ データベース初期化完了: {db_path}")
@@ -0,0 +1,11 @@
+-- Postgres / Supabase 用：メンバーテーブルの作成（1回だけ実行）
+-- MEMBER_SOURCE=db のときに参照する。内容は member.txt と同じで aliases はカンマ区切り
+-- データの投入・更新は member.txt から生成した SQL を流す:
+--   cd app && python -m db.seed_member | psql "$POSTGRES_DSN"
+--   （Supabase は出力を SQL Editor に貼り付けて実行）
+
+CREATE TABLE IF NOT EXISTS member (
+    name text PRIMARY KEY,
+    discord_id text NOT NULL,
+    aliases text NOT NULL
+);
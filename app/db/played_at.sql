@@ -0,0 +1,14 @@
+-- Postgres / Supabase 用：日時列の追加と既存データからの作成（1回だけ実行）
+
+ALTER TABLE result_12 ADD COLUMN IF NOT EXISTS played_at timestamp;
+ALTER TABLE result_24 ADD COLUMN IF NOT EXISTS played_at timestamp;
+
+-- date（"yyyy/mm/dd hh"）から作成
+UPDATE result_12 SET played_at = to_timestamp(date, 'YYYY/MM/DD HH24')::timestamp
+WHERE played_at IS NULL;
+UPDATE result_24 SET played_at = to_timestamp(date, 'YYYY/MM/DD HH24')::timestamp
+WHERE played_at IS NULL;
+
+-- 日時範囲用インデックス
+CREATE INDEX IF NOT EXISTS idx_result_12_played_at ON result_12 (played_at);
+CREATE INDEX IF NOT EXISTS idx_result_24_played_at ON result_24 (played_at);
@@ -0,0 +1,7 @@
+-- Postgres / Supabase 用：書き込みキューの冪等キー列の追加（1回だけ実行）
+
+ALTER TABLE result_12 ADD COLUMN IF NOT EXISTS request_key text;
+ALTER TABLE result_24 ADD COLUMN IF NOT EXISTS request_key text;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_result_12_request_key ON result_12 (request_key);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_result_24_request_key ON result_24 (request_key);
@@ -0,0 +1,23 @@
+-- Postgres / Supabase 用：出場メンバーテーブルの作成と既存データからの作成（1回だけ実行）
+
+CREATE TABLE IF NOT EXISTS result_player (
+    result_table text NOT NULL,
+    result_id bigint NOT NULL,
+    member text NOT NULL,
+    PRIMARY KEY (result_table, result_id, member)
+);
+
+-- member フィルタ用インデックス
+CREATE INDEX IF NOT EXISTS idx_result_player_member
+    ON result_player (result_table, member, result_id);
+
+-- 既存の player 文字列から作成
+INSERT INTO result_player (result_table, result_id, member)
+SELECT DISTINCT 'result_12', result_id, unnest(string_to_array(player, ' '))
+FROM result_12
+ON CONFLICT DO NOTHING;
+
+INSERT INTO result_player (result_table, result_id, member)
+SELECT DISTINCT 'result_24', result_id, unnest(string_to_array(player, ' '))
+FROM result_24
+ON CONFLICT DO NOTHING;
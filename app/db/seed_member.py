@@ -0,0 +1,40 @@
+"""
+member.txt から member テーブルへの投入用 SQL を出力する
+
+    cd app
+    python -m db.seed_member [member.txt] | psql "$POSTGRES_DSN"
+    python -m db.seed_member | sqlite3 db/result.db
+
+登録名が同じ行は discord_id / aliases を上書きする（何度流しても同じ結果になる）。
+Supabase は出力を SQL Editor に貼り付けて実行する。
+"""
+import sys
+from services.members import MEMBER_FILE, read_member_file
+
+
+# SQL の文字列リテラル
+def quote(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+# member.txt の内容を1つの INSERT 文にする（Postgres / SQLite 共通の構文）
+def seed_sql(path: str) -> str:
+    entries = read_member_file(path)
+    if not entries:
+        return ""
+
+    values = ",\n    ".join(
+        "(" + ", ".join(quote(v) for v in fields) + ")" for fields in entries
+    )
+    return (
+        "INSERT INTO member (name, discord_id, aliases) VALUES\n"
+        f"    {values}\n"
+        "ON CONFLICT (name) DO UPDATE SET\n"
+        "    discord_id = excluded.discord_id,\n"
+        "    aliases = excluded.aliases;\n"
+    )
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else MEMBER_FILE
+    sys.stdout.write(seed_sql(path))
@@ -0,0 +1,153 @@
+"""
+コース・接続・メンバーのデータを1つのバンドルにまとめるビルド手順
+
+    cd app
+    python -m services.data_bundle
+
+track.json / track_connect.json / member.txt を検証し、正規化済みの
+索引（TrackData / MemberData）を作ってからバンドルに書き出す。
+起動時はバンドルを1回読み込むだけで済む。
+元ファイルがバンドル作成後に変わっていれば、バンドルは使わずに
+元ファイルから読み込む（古いバンドルで動くことはない）。
+"""
+import json
+import os
+import pickle
+import sys
+import time
+from services.members import MEMBER_FILE, parse_member_file
+from services.track_index import build_track_data, normalize
+
+DATA_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "data"))
+TRACK_FILE = os.path.join(DATA_DIR, "track.json")
+CONNECT_FILE = os.path.join(DATA_DIR, "track_connect.json")
+BUNDLE_FILE = os.getenv("DATA_BUNDLE", os.path.join(DATA_DIR, "data.bundle"))
+
+# バンドルの形式（中身の構造を変えたら上げる）
+BUNDLE_MAGIC = b"RICEBNDL"
+BUNDLE_VERSION = 1
+
+
+# 元ファイルの更新時刻（バンドルの鮮度確認用）
+def source_stamps(paths) -> dict:
+    return {os.path.basename(p): os.stat(p).st_mtime_ns for p in paths}
+
+
+# 参照整合性の確認（問題の一覧を返す）
+def check_integrity(tracks, connects) -> list[str]:
+    errors = []
+
+    names = [entry["name"] for entry in tracks]
+    seen = set()
+    for name in names:
+        if name in seen:
+            errors.append(f"コース名の重複: {name}")
+        seen.add(name)
+
+    # 別名が複数のコースを指していないか
+    owners = {}
+    for entry in tracks:
+        for alias in entry.get("aliases", []):
+            key = normalize(alias)
+            owner = owners.setdefault(key, entry["name"])
+            if owner != entry["name"]:
+                errors.append(f"別名「{alias}」が {owner} と {entry['name']} の両方にあります")
+
+    # 接続の始点・終点が既知のコースか
+    known = {normalize(name) for name in names}
+    for i, c in enumerate(connects, 1):
+        for field in ("start", "end"):
+            if normalize(c[field]) not in known:
+                errors.append(f"track_connect.json {i}件目: 未登録のコース {c[field]}（{field}）")
+
+    return errors
+
+
+# バンドルの作成（問題があれば ValueError）
+def build_bundle(path=BUNDLE_FILE, member_file=MEMBER_FILE):
+    sources = [TRACK_FILE, CONNECT_FILE, member_file]
+    stamps = source_stamps(sources)
+
+    with open(TRACK_FILE, encoding="utf-8") as f:
+        tracks = json.load(f)
+    with open(CONNECT_FILE, encoding="utf-8") as f:
+        connects = json.load(f)
+
+    # 形式チェックを先に済ませてから参照整合性を確認する
+    track_data = build_track_data(tracks, connects)
+    errors = check_integrity(tracks, connects)
+    if errors:
+        raise ValueError("\n".join(errors))
+
+    payload = {
+        "version": BUNDLE_VERSION,
+        "built_at": time.time(),
+        "sources": stamps,
+        "tracks": track_data,
+        "members": parse_member_file(member_file),
+    }
+
+    # 書き出しは一時ファイルから差し替える
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(BUNDLE_MAGIC)
+        pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+    return payload
+
+
+# 読み込んだバンドル（コースとメンバーで同じものを使う）
+_loaded = {}    # パス -> (バンドルの更新時刻, 中身)
+
+
+def _read_bundle(path):
+    try:
+        mtime = os.stat(path).st_mtime_ns
+        cached = _loaded.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        with open(path, "rb") as f:
+            if f.read(len(BUNDLE_MAGIC)) != BUNDLE_MAGIC:
+                return None
+            payload = pickle.load(f)
+    except Exception as e:
+        # 古い形式のまま残ったバンドルなど（読めなければ古いものとして扱う）
+        print(f"[bundle] 読み込み失敗のため元ファイルを使用: {e!r}")
+        return None
+    if not isinstance(payload, dict):
+        return None
+
+    _loaded[path] = (mtime, payload)
+    return payload
+
+
+# バンドルの読み込み（ないか古ければ None）
+def load_bundle(path=BUNDLE_FILE, member_file=MEMBER_FILE):
+    payload = _read_bundle(path)
+    if payload is None:
+        return None
+
+    if payload.get("version") != BUNDLE_VERSION:
+        return None
+    try:
+        if payload["sources"] != source_stamps([TRACK_FILE, CONNECT_FILE, member_file]):
+            return None
+    except OSError:
+        return None
+    return payload
+
+
+if __name__ == "__main__":
+    try:
+        payload = build_bundle()
+    except (OSError, ValueError) as e:
+        print(f"バンドル作成失敗:\n{e}")
+        sys.exit(1)
+
+    tracks = payload["tracks"]
+    print(
+        f"{BUNDLE_FILE} を書き出しました "
+        f"(v{BUNDLE_VERSION}, 別名 {len(tracks.track_dict)} / 接続 {len(tracks.connects)} / "
+        f"メンバー {len(payload['members'].id_map)})"
+    )
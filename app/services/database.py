@@ -0,0 +1,130 @@
+import asyncio
+import os
+
+# 1回のDBアクセスのタイムアウト（秒）
+DB_TIMEOUT = float(os.getenv("DB_TIMEOUT", "10"))
+# DBアクセスの同時実行数の上限
+DB_CONCURRENCY = int(os.getenv("DB_CONCURRENCY", "4"))
+
+
+# 待つのをやめた後に失敗した処理（例外は呼び出し元に届かないのでここで回収する）
+def _log_late_failure(task):
+    if not task.cancelled() and task.exception() is not None:
+        print(f"[db] 待機打ち切り後に失敗: {task.exception()!r}")
+
+
+# ストレージへの非同期アクセス窓口
+class Database:
+    """
+    各 Cog はこのクラス経由でDBにアクセスする。
+    呼び出しごとにタイムアウトをかけ、同時実行数を制限することで
+    DB の遅延がイベントループ全体を止めないようにする。
+    タイムアウトしても裏の処理（スレッド上のクエリなど）は止まらないので、
+    同時実行数の枠はその処理が終わるまで返さない。
+    """
+
+    def __init__(self, backend, timeout=DB_TIMEOUT, concurrency=DB_CONCURRENCY):
+        self.backend = backend
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def _run(self, func, *args, **kwargs):
+        await self._semaphore.acquire()
+        try:
+            task = asyncio.ensure_future(func(*args, **kwargs))
+        except BaseException:
+            self._semaphore.release()
+            raise
+        task.add_done_callback(self._release)
+
+        # 待つのをやめても task は最後まで動かし、終わったときに枠を返す
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), self.timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            task.add_done_callback(_log_late_failure)
+            raise
+
+    def _release(self, task):
+        self._semaphore.release()
+
+    # 戦績件数（member / enemy / 日時範囲で絞り込み）
+    async def count_results(
+        self, table, member=None, enemy=None, since=None, until=None
+    ):
+        return await self._run(
+            self.backend.count_results, table, member, enemy,
+            since=since, until=until
+        )
+
+    # 戦績ページ取得（result_id のキーセット方式、昇順で返す）
+    async def fetch_results(
+        self, table, member=None, enemy=None, since=None, until=None,
+        before=None, after=None, limit=20
+    ):
+        return await self._run(
+            self.backend.fetch_results, table, member, enemy,
+            since=since, until=until,
+            before=before, after=after, limit=limit
+        )
+
+    # result_id 指定で1件取得（なければ None）
+    async def fetch_result(self, table, result_id):
+        return await self._run(self.backend.fetch_result, table, result_id)
+
+    # 戦績登録
+    async def insert_result(self, table, row):
+        return await self._run(self.backend.insert_result, table, row)
+
+    # 戦績一括登録（1トランザクション）
+    async def insert_results(self, table, rows):
+        return await self._run(self.backend.insert_results, table, rows)
+
+    # 戦績削除
+    async def delete_result(self, table, result_id):
+        return await self._run(self.backend.delete_result, table, result_id)
+
+    # VR登録・更新
+    async def upsert_vr(self, user_id, vr):
+        return await self._run(self.backend.upsert_vr, user_id, vr)
+
+    # VR取得（なければ None）
+    async def fetch_vr(self, user_id):
+        return await self._run(self.backend.fetch_vr, user_id)
+
+    # 複数ユーザーのVR取得
+    async def fetch_vrs(self, user_ids):
+        return await self._run(self.backend.fetch_vrs, user_ids)
+
+    # メンバー一覧取得
+    async def fetch_members(self):
+        return await self._run(self.backend.fetch_members)
+
+    # 疎通確認（Postgres の場合はプールのヘルスチェック）
+    async def ping(self):
+        return await self._run(self.backend.ping)
+
+    # バックエンドの後片付け
+    async def close(self):
+        await self.backend.close()
+
+
+# 使用するバックエンドの生成（DB_BACKEND: supabase / postgres / sqlite）
+def create_backend():
+    kind = os.getenv("DB_BACKEND", "supabase")
+
+    if kind == "sqlite":
+        from services.sqlite_storage import SqliteStorage
+        return SqliteStorage()
+
+    if kind == "postgres":
+        from services.postgres_storage import PostgresStorage
+        return PostgresStorage()
+
+    if kind == "supabase":
+        from services.supabase_storage import SupabaseStorage
+        return SupabaseStorage()
+
+    raise ValueError(f"不明な DB_BACKEND: {kind}")
+
+
+db = Database(create_backend())
@@ -0,0 +1,79 @@
+import bisect
+import heapq
+from collections import Counter
+from services.result_mirror import MirrorListener, mirror
+from services.storage import ENEMY_COLUMNS
+
+# Discord の autocomplete で返せる候補数の上限
+MAX_CHOICES = 25
+
+
+# 1テーブル分の敵チームタグ索引
+class TagIndex:
+    def __init__(self):
+        self.keys = []          # (小文字化したタグ, タグ) の昇順（前方一致の二分探索用）
+        self.count = Counter()  # タグ -> 試合数
+        self.last = {}          # タグ -> 最後に対戦した日時（"yyyy/mm/dd hh"）
+
+    def add(self, tag, date):
+        if self.count[tag] == 0:
+            bisect.insort(self.keys, (tag.casefold(), tag))
+        self.count[tag] += 1
+        if date > self.last.get(tag, ""):
+            self.last[tag] = date
+
+    def remove(self, tag):
+        if self.count[tag] <= 0:
+            return
+        self.count[tag] -= 1
+        if self.count[tag] == 0:
+            del self.count[tag]
+            self.last.pop(tag, None)
+            i = bisect.bisect_left(self.keys, (tag.casefold(), tag))
+            del self.keys[i]
+
+    # 前方一致するタグを試合数・新しさの順に返す
+    def suggest(self, prefix, limit=MAX_CHOICES):
+        key = prefix.casefold()
+        lo = bisect.bisect_left(self.keys, (key,))
+        hi = bisect.bisect_left(self.keys, (key + "\U0010ffff",))
+        tags = (tag for _, tag in self.keys[lo:hi])
+        return heapq.nlargest(
+            limit, tags, key=lambda t: (self.count[t], self.last[t])
+        )
+
+
+# 対戦履歴の敵チームタグ（ミラーの追加・削除に合わせて差分更新する）
+class EnemyTags(MirrorListener):
+    def __init__(self):
+        self.tables = {table: TagIndex() for table in ENEMY_COLUMNS}
+
+    @staticmethod
+    def _tags(table, row):
+        return {row[c] for c in ENEMY_COLUMNS[table]}
+
+    # ResultMirror の listener
+    def build(self, table, rows):
+        index = TagIndex()
+        for row in rows:
+            for tag in self._tags(table, row):
+                index.add(tag, row["date"])
+        return index
+
+    def install(self, table, index):
+        self.tables[table] = index
+
+    def on_add(self, table, row):
+        for tag in self._tags(table, row):
+            self.tables[table].add(tag, row["date"])
+
+    def on_remove(self, table, row):
+        for tag in self._tags(table, row):
+            self.tables[table].remove(tag)
+
+    def suggest(self, table, prefix, limit=MAX_CHOICES):
+        return self.tables[table].suggest(prefix, limit)
+
+
+enemy_tags = EnemyTags()
+mirror.add_listener(enemy_tags)
@@ -0,0 +1,135 @@
+import os
+from collections import deque
+from services.result_mirror import MirrorListener, mirror, play_order
+from services.result_stats import POINTS, outcome
+
+# 直近何試合で集計するか
+FORM_WINDOW = int(os.getenv("FORM_WINDOW", "10"))
+
+# 1メンバー・1敵チーム分の直近成績（古い試合は押し出しながら合計を更新する）
+class FormWindow:
+    __slots__ = ("recent", "points", "margin", "streak", "streak_len", "last")
+
+    def __init__(self, size=FORM_WINDOW):
+        self.recent = deque(maxlen=size)    # (勝敗, 点差)
+        self.points = 0.0
+        self.margin = 0
+        self.streak = None
+        self.streak_len = 0
+        self.last = None
+
+    def push(self, row):
+        result = outcome("result_12", row)
+        margin = row["my_score"] - row["enemy_score"]
+
+        if len(self.recent) == self.recent.maxlen:
+            old_result, old_margin = self.recent[0]
+            self.points -= POINTS[old_result]
+            self.margin -= old_margin
+        self.recent.append((result, margin))
+        self.points += POINTS[result]
+        self.margin += margin
+
+        if result == self.streak:
+            self.streak_len += 1
+        else:
+            self.streak, self.streak_len = result, 1
+        self.last = play_order(row)
+
+    @property
+    def games(self):
+        return len(self.recent)
+
+    @property
+    def win_rate(self):
+        return self.points / len(self.recent) if self.recent else 0.0
+
+    @property
+    def avg_margin(self):
+        return self.margin / len(self.recent) if self.recent else 0.0
+
+
+# 6v6 の直近成績（ミラーの追加に合わせて1試合ずつ流し込む）
+class RollingForm(MirrorListener):
+    """
+    メンバーごと・敵チームごとに直近 FORM_WINDOW 試合の窓を持つ。
+    最新の試合の追加は窓に流し込むだけで済ませ、過去日時の登録や
+    削除で窓が崩れたキーだけ、次に参照したときにミラーの索引から作り直す。
+    """
+
+    def __init__(self, result_mirror=mirror, size=FORM_WINDOW):
+        self.mirror = result_mirror
+        self.size = size
+        self.windows = {}       # ("member" | "enemy", キー) -> FormWindow
+        self.dirty = set()
+
+    @staticmethod
+    def _keys(row):
+        keys = [("member", name) for name in set(row["player"].split())]
+        keys.append(("enemy", row["enemy"]))
+        return keys
+
+    def _push(self, key, row, windows=None):
+        if windows is None:
+            windows = self.windows
+        window = windows.get(key)
+        if window is None:
+            window = windows[key] = FormWindow(self.size)
+        window.push(row)
+
+    # ResultMirror の listener（対象は result_12 のみ）
+    def build(self, table, rows):
+        if table != "result_12":
+            return None
+        windows = {}
+        for row in sorted(rows, key=play_order):
+            for key in self._keys(row):
+                self._push(key, row, windows)
+        return windows
+
+    def install(self, table, windows):
+        if table != "result_12":
+            return
+        self.windows = windows
+        self.dirty = set()
+
+    def on_add(self, table, row):
+        if table != "result_12":
+            return
+        for key in self._keys(row):
+            window = self.windows.get(key)
+            if key in self.dirty:
+                continue
+            if window is not None and play_order(row) < window.last:
+                self.dirty.add(key)
+            else:
+                self._push(key, row)
+
+    def on_remove(self, table, row):
+        if table != "result_12":
+            return
+        self.dirty.update(self._keys(row))
+
+    # 窓の取得（崩れていればそのキーの試合だけで作り直す。試合がなければ None）
+    def get(self, kind, key):
+        if (kind, key) in self.dirty:
+            self.dirty.discard((kind, key))
+            self.windows.pop((kind, key), None)
+
+            table = self.mirror.tables["result_12"]
+            index = table.by_member if kind == "member" else table.by_enemy
+            rows = [table.rows[i] for i in index.get(key, [])]
+            for row in sorted(rows, key=play_order):
+                self._push((kind, key), row)
+
+        return self.windows.get((kind, key))
+
+    def member(self, name):
+        return self.get("member", name)
+
+    def enemy(self, enemy):
+        return self.get("enemy", enemy)
+
+
+rolling_form = RollingForm()
+mirror.add_listener(rolling_form)
@@ -0,0 +1,140 @@
+import heapq
+from itertools import combinations
+from services.result_mirror import MirrorListener, mirror
+from services.result_stats import POINTS, outcome
+from services.storage import ENEMY_COLUMNS, participants
+
+# 1編成の人数
+LINEUP_SIZE = 6
+# 試合数が少ないメンバー・ペアを平均に寄せるための仮想試合数
+PRIOR_GAMES = 5
+PRIOR_MEAN = 0.5
+
+
+# 1試合の成績を 0〜1 に揃える（6v6 は勝ち 1 / 引き分け 0.5、24人戦は 1位 1 〜 4位 0）
+def performance(table, row):
+    if table == "result_12":
+        return POINTS[outcome(table, row)]
+    return (4 - row["rank"]) / 3
+
+
+# 個人とペアの成績（ミラーの追加・削除に合わせて差分更新する）
+class LineupStats(MirrorListener):
+    def __init__(self):
+        # table -> メンバー名 / (名前, 名前) -> [試合数, 成績の合計]
+        self.members = {table: {} for table in ENEMY_COLUMNS}
+        self.pairs = {table: {} for table in ENEMY_COLUMNS}
+
+    @staticmethod
+    def _count(index, key, games, total):
+        entry = index.setdefault(key, [0, 0.0])
+        entry[0] += games
+        entry[1] += total
+        if entry[0] <= 0:
+            del index[key]
+
+    @classmethod
+    def _apply(cls, members, pairs, table, row, sign):
+        value = performance(table, row)
+        names = sorted(participants(row))
+
+        for name in names:
+            cls._count(members, name, sign, sign * value)
+        for pair in combinations(names, 2):
+            cls._count(pairs, pair, sign, sign * value)
+
+    # ResultMirror の listener
+    def build(self, table, rows):
+        members, pairs = {}, {}
+        for row in rows:
+            self._apply(members, pairs, table, row, 1)
+        return members, pairs
+
+    def install(self, table, state):
+        self.members[table], self.pairs[table] = state
+
+    def on_add(self, table, row):
+        self._apply(self.members[table], self.pairs[table], table, row, 1)
+
+    def on_remove(self, table, row):
+        self._apply(self.members[table], self.pairs[table], table, row, -1)
+
+    # 両テーブルを合わせた (試合数, 成績の合計)
+    def _totals(self, index, key):
+        games = total = 0
+        for table in ENEMY_COLUMNS:
+            entry = index[table].get(key)
+            if entry:
+                games += entry[0]
+                total += entry[1]
+        return games, total
+
+    # 個人の評価（試合数で平均に寄せた成績）
+    def member_score(self, name):
+        games, total = self._totals(self.members, name)
+        return (total + PRIOR_GAMES * PRIOR_MEAN) / (games + PRIOR_GAMES)
+
+    def member_games(self, name):
+        return self._totals(self.members, name)[0]
+
+    # ペアの相性（一緒に出た試合が個人の評価の平均よりどれだけ良いか）
+    def pair_bonus(self, a, b, scores):
+        games, total = self._totals(self.pairs, tuple(sorted((a, b))))
+        if games == 0:
+            return 0.0
+        base = (scores[a] + scores[b]) / 2
+        return (total - games * base) / (games + PRIOR_GAMES)
+
+
+# 編成の探索（分枝限定法で上位 top 件を返す）
+def best_lineups(stats, names, top=3, size=LINEUP_SIZE):
+    """
+    評価 = 個人の評価の合計 + 全ペアの相性の合計。
+    途中まで選んだ編成について「残りを最良の候補で埋めた場合」の
+    上限を計算し、上位 top 件の最低値に届かない枝は打ち切る。
+    """
+    # 個人の評価が高い順に並べると早く良い解が見つかり、打ち切りが効く
+    scores = {name: stats.member_score(name) for name in names}
+    names = sorted(names, key=lambda n: scores[n], reverse=True)
+    n = len(names)
+
+    bonus = [[0.0] * n for _ in range(n)]
+    for i, j in combinations(range(n), 2):
+        bonus[i][j] = bonus[j][i] = stats.pair_bonus(names[i], names[j], scores)
+    # 未選択同士のペアの相性の上限
+    max_bonus = max((max(0.0, b) for row in bonus for b in row), default=0.0)
+
+    best = []   # (評価, 編成) の最小ヒープ
+
+    def search(start, chosen, value, gain):
+        # gain[c]: c を加えたときの増分（個人の評価 + 選択済みとの相性）
+        k = size - len(chosen)
+        if k == 0:
+            entry = (value, [names[i] for i in chosen])
+            if len(best) < top:
+                heapq.heappush(best, entry)
+            elif value > best[0][0]:
+                heapq.heapreplace(best, entry)
+            return
+        if n - start < k:
+            return
+
+        if len(best) == top:
+            bound = value + sum(heapq.nlargest(k, gain[start:])) + max_bonus * k * (k - 1) / 2
+            if bound <= best[0][0]:
+                return
+
+        for c in range(start, n - k + 1):
+            next_gain = gain[:]
+            for other in range(c + 1, n):
+                next_gain[other] += bonus[c][other]
+            chosen.append(c)
+            search(c + 1, chosen, value + gain[c], next_gain)
+            chosen.pop()
+
+    search(0, [], 0.0, [scores[name] for name in names])
+    return sorted(best, reverse=True)
+
+
+lineup_stats = LineupStats()
+mirror.add_listener(lineup_stats)
@@ -0,0 +1,145 @@
+import asyncio
+import os
+import time
+from typing import NamedTuple
+
+# メンバーファイルの場所
+MEMBER_FILE = os.path.normpath(
+    os.path.join(os.path.dirname(__file__), "..", "data", "member.txt")
+)
+# メンバー情報の取得元（file: member.txt / db: member テーブル）
+MEMBER_SOURCE = os.getenv("MEMBER_SOURCE", "file")
+# db の場合の再取得間隔（秒）
+MEMBER_DB_TTL = float(os.getenv("MEMBER_DB_TTL", "300"))
+# db の再取得に失敗したときに次に試すまでの間隔（秒）
+MEMBER_DB_RETRY = float(os.getenv("MEMBER_DB_RETRY", "30"))
+
+
+# 解決用のインデックス
+class MemberData(NamedTuple):
+    alias_map: dict     # alias -> 登録名
+    id_map: dict        # discord_id -> 登録名
+
+
+# (登録名, discord_id, "alias,alias,...") の並びからインデックスを作る
+def build_member_data(entries) -> MemberData:
+    alias_map = {}
+    id_map = {}
+
+    for name, discord_id, aliases in entries:
+        id_map[str(discord_id)] = name
+        for a in aliases.split(","):
+            if a:
+                alias_map[a] = name
+
+    return MemberData(alias_map, id_map)
+
+
+# member.txt の行の読み込み（登録名:discord_id:alias,alias,...）
+def read_member_file(path: str) -> list:
+    entries = []
+
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            fields = line.split(":")
+            if len(fields) != 3:
+                raise ValueError(f"member.txt {line_no}行目: 登録名:discord_id:alias の形式ではありません")
+            entries.append(fields)
+
+    return entries
+
+
+# member.txt からインデックスを作る
+def parse_member_file(path: str) -> MemberData:
+    return build_member_data(read_member_file(path))
+
+
+# メンバー情報のキャッシュ
+class MemberRegistry:
+    """
+    一度読み込んだインデックスを使い回し、member.txt の更新時刻が
+    変わったとき（db の場合は TTL 切れのとき）だけ読み直す。
+    読み直しは新しい MemberData を作ってから差し替えるので、
+    参照中のインデックスが途中で壊れることはない。
+    読み直しに失敗した場合は前回のインデックスのまま応答を続ける。
+    """
+
+    def __init__(self, source=MEMBER_SOURCE, path=MEMBER_FILE):
+        self.source = source
+        self.path = path
+        self.data = MemberData({}, {})
+        self._version = None
+        self._lock = asyncio.Lock()
+
+    def _file_changed(self) -> bool:
+        try:
+            return os.stat(self.path).st_mtime_ns != self._version
+        except OSError:
+            # 一度読めていれば消えたファイルより今のインデックスを優先する
+            return self._version is None
+
+    def _db_expired(self) -> bool:
+        return self._version is None or time.monotonic() - self._version > MEMBER_DB_TTL
+
+    def is_stale(self) -> bool:
+        if self.source == "db":
+            return self._db_expired()
+        return self._file_changed()
+
+    async def reload(self):
+        if self.source == "db":
+            from services.database import db
+            rows = await db.fetch_members()
+            data = build_member_data(
+                (r["name"], r["discord_id"], r["aliases"]) for r in rows
+            )
+            version = time.monotonic()
+        else:
+            from services.data_bundle import load_bundle
+            version = os.stat(self.path).st_mtime_ns
+            # 最新のバンドルがあれば組み立て済みのインデックスを使う
+            bundle = load_bundle(member_file=self.path)
+            if bundle is not None:
+                data = bundle["members"]
+            else:
+                data = parse_member_file(self.path)
+
+        self.data = data
+        self._version = version
+
+    # 更新時刻に関係なく読み直す（失敗したら今のインデックスのまま）
+    async def force_reload(self) -> MemberData:
+        async with self._lock:
+            await self.reload()
+        return self.data
+
+    # 読み直しに失敗したときは、次に試すまで今のインデックスを使い続ける
+    def _postpone(self):
+        if self.source == "db":
+            self._version = time.monotonic() - MEMBER_DB_TTL + MEMBER_DB_RETRY
+        else:
+            try:
+                self._version = os.stat(self.path).st_mtime_ns
+            except OSError:
+                pass
+
+    # 必要なら読み直して最新のインデックスを返す
+    async def get(self) -> MemberData:
+        if self.is_stale():
+            async with self._lock:
+                if self.is_stale():
+                    try:
+                        await self.reload()
+                    except Exception as e:
+                        # 初回は使えるインデックスがないのでそのまま失敗させる
+                        if self._version is None:
+                            raise
+                        print(f"[members] 再読み込み失敗（前回の内容を使用）: {e}")
+                        self._postpone()
+        return self.data
+
+
+member_registry = MemberRegistry()
@@ -0,0 +1,220 @@
+import asyncio
+import os
+from datetime import datetime
+import asyncpg
+from services.storage import ENEMY_COLUMNS, Storage, participants
+
+# 接続プールのサイズ
+POOL_MIN_SIZE = int(os.getenv("PG_POOL_MIN", "1"))
+POOL_MAX_SIZE = int(os.getenv("PG_POOL_MAX", "5"))
+
+
+# 絞り込み条件（member: $1, enemy: $2, since: $3, until: $4）
+def _filter_sql(table: str) -> str:
+    enemy_cols = ", ".join(ENEMY_COLUMNS[table])
+    return (
+        "($1::text IS NULL OR result_id IN ("
+        "SELECT result_id FROM result_player "
+        f"WHERE result_table = '{table}' AND member = $1)) "
+        f"AND ($2::text IS NULL OR $2 IN ({enemy_cols})) "
+        "AND ($3::timestamp IS NULL OR played_at >= $3) "
+        "AND ($4::timestamp IS NULL OR played_at < $4)"
+    )
+
+
+# テーブルごとの定型クエリ
+def _build_queries(table: str) -> dict:
+    where = _filter_sql(table)
+    return {
+        "count": f"SELECT count(*) FROM {table} WHERE {where}",
+        "page_before": (
+            f"SELECT * FROM {table} WHERE {where} "
+            "AND ($5::bigint IS NULL OR result_id < $5) "
+            "ORDER BY result_id DESC LIMIT $6"
+        ),
+        "page_after": (
+            f"SELECT * FROM {table} WHERE {where} "
+            "AND result_id > $5 "
+            "ORDER BY result_id LIMIT $6"
+        ),
+        "by_id": f"SELECT * FROM {table} WHERE result_id = $1",
+        "by_request_key": f"SELECT * FROM {table} WHERE request_key = $1",
+        "delete": f"DELETE FROM {table} WHERE result_id = $1",
+        "delete_players": (
+            "DELETE FROM result_player "
+            f"WHERE result_table = '{table}' AND result_id = $1"
+        ),
+    }
+
+
+QUERIES = {table: _build_queries(table) for table in ENEMY_COLUMNS}
+
+UPSERT_VR = (
+    "INSERT INTO user_vr (user_id, vr) VALUES ($1, $2) "
+    "ON CONFLICT (user_id) DO UPDATE SET vr = EXCLUDED.vr"
+)
+SELECT_VR = "SELECT vr FROM user_vr WHERE user_id = $1"
+SELECT_VRS = "SELECT user_id, vr FROM user_vr WHERE user_id = ANY($1::bigint[])"
+SELECT_MEMBERS = "SELECT name, discord_id, aliases FROM member"
+INSERT_PLAYER = (
+    "INSERT INTO result_player (result_table, result_id, member) "
+    "VALUES ($1, $2, $3)"
+)
+
+
+# played_at は他のバックエンドと揃えて ISO 形式の文字列で受け渡す
+def _to_timestamp(value):
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _to_row(record):
+    row = dict(record)
+    if isinstance(row.get("played_at"), datetime):
+        row["played_at"] = row["played_at"].isoformat()
+    return row
+
+
+# INSERT 文（列の並びが同じなら同じ文になる）
+def _insert_sql(table: str, columns) -> str:
+    cols = ", ".join(columns)
+    params = ", ".join(f"${i}" for i in range(1, len(columns) + 1))
+    return (
+        f"INSERT INTO {table} ({cols}) VALUES ({params}) "
+        "ON CONFLICT (request_key) DO NOTHING RETURNING *"
+    )
+
+
+# Postgres 直結バックエンド（asyncpg の接続プール）
+class PostgresStorage(Storage):
+    """
+    クエリ文は固定文字列なので、asyncpg が接続ごとに
+    プリペアドステートメントとしてキャッシュ・再利用する。
+    pgbouncer の transaction モード経由では使えないため、
+    Supabase の場合は session モードの接続先を POSTGRES_DSN に指定する。
+    """
+
+    def __init__(self, dsn=None):
+        self.dsn = dsn or os.getenv("POSTGRES_DSN")
+        if not self.dsn:
+            raise ValueError("POSTGRES_DSN が環境変数に設定されていません")
+        self.pool = None
+        self._pool_lock = asyncio.Lock()
+
+    async def get_pool(self):
+        if self.pool is None:
+            async with self._pool_lock:
+                if self.pool is None:
+                    self.pool = await asyncpg.create_pool(
+                        self.dsn,
+                        min_size=POOL_MIN_SIZE,
+                        max_size=POOL_MAX_SIZE,
+                    )
+        return self.pool
+
+    async def close(self):
+        if self.pool is not None:
+            await self.pool.close()
+            self.pool = None
+
+    async def count_results(
+        self, table, member=None, enemy=None, since=None, until=None
+    ):
+        pool = await self.get_pool()
+        return await pool.fetchval(
+            QUERIES[table]["count"], member, enemy,
+            _to_timestamp(since), _to_timestamp(until)
+        )
+
+    async def fetch_results(
+        self, table, member=None, enemy=None, since=None, until=None,
+        before=None, after=None, limit=20
+    ):
+        pool = await self.get_pool()
+        filters = (member, enemy, _to_timestamp(since), _to_timestamp(until))
+
+        if after is not None:
+            records = await pool.fetch(
+                QUERIES[table]["page_after"], *filters, after, limit
+            )
+            return [_to_row(r) for r in records]
+
+        records = await pool.fetch(
+            QUERIES[table]["page_before"], *filters, before, limit
+        )
+        return [_to_row(r) for r in reversed(records)]
+
+    async def fetch_result(self, table, result_id):
+        pool = await self.get_pool()
+        record = await pool.fetchrow(QUERIES[table]["by_id"], result_id)
+        return _to_row(record) if record else None
+
+    async def insert_results(self, table, rows):
+        if table not in QUERIES:
+            raise ValueError(f"不明なテーブル: {table}")
+        pool = await self.get_pool()
+
+        inserted = []
+        created = []
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                for row in rows:
+                    columns = sorted(row)
+                    record = await conn.fetchrow(
+                        _insert_sql(table, columns),
+                        *(
+                            _to_timestamp(row[c]) if c == "played_at" else row[c]
+                            for c in columns
+                        )
+                    )
+
+                    # 同じ request_key が登録済み（再送）なら既存の行を返す
+                    if record is None:
+                        record = await conn.fetchrow(
+                            QUERIES[table]["by_request_key"], row["request_key"]
+                        )
+                        inserted.append(_to_row(record))
+                        continue
+
+                    inserted.append(_to_row(record))
+                    created.append(inserted[-1])
+
+                await conn.executemany(
+                    INSERT_PLAYER,
+                    [
+                        (table, record["result_id"], m)
+                        for record in created
+                        for m in participants(record)
+                    ]
+                )
+        return inserted
+
+    async def delete_result(self, table, result_id):
+        pool = await self.get_pool()
+
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute(QUERIES[table]["delete_players"], result_id)
+                await conn.execute(QUERIES[table]["delete"], result_id)
+
+    async def upsert_vr(self, user_id, vr):
+        pool = await self.get_pool()
+        await pool.execute(UPSERT_VR, user_id, vr)
+
+    async def fetch_vr(self, user_id):
+        pool = await self.get_pool()
+        return await pool.fetchval(SELECT_VR, user_id)
+
+    async def fetch_vrs(self, user_ids):
+        pool = await self.get_pool()
+        records = await pool.fetch(SELECT_VRS, list(user_ids))
+        return [dict(r) for r in records]
+
+    async def fetch_members(self):
+        pool = await self.get_pool()
+        records = await pool.fetch(SELECT_MEMBERS)
+        return [dict(r) for r in records]
+
+    async def ping(self):
+        # プールから接続を借りて生存確認（壊れた接続はプールが張り直す）
+        pool = await self.get_pool()
+        await pool.fetchval("SELECT 1")
@@ -0,0 +1,110 @@
+from services.result_mirror import MirrorListener, mirror, play_order
+from services.result_stats import POINTS, judge, month_of
+from services.storage import ENEMY_COLUMNS
+
+# Elo の初期値と変動幅
+INITIAL_RATING = 1500.0
+K_FACTOR = 32.0
+
+
+# rating_a のチームが rating_b に勝つ期待値
+def expected(rating_a, rating_b):
+    return 1 / (1 + 10 ** ((rating_b - rating_a) / 400))
+
+
+# 試合に出たチームと点数（自チームは None）
+def teams_of(table, row):
+    if table == "result_12":
+        return [(None, row["my_score"]), (row["enemy"], row["enemy_score"])]
+    return [
+        (None, row["my_score"]),
+        (row["enemy1"], row["score1"]),
+        (row["enemy2"], row["score2"]),
+        (row["enemy3"], row["score3"]),
+    ]
+
+
+# 1テーブル分のレーティング
+class TableRating:
+    def __init__(self):
+        self.us = INITIAL_RATING
+        self.enemies = {}       # 敵チームタグ -> レーティング
+        self.games = {}         # 敵チームタグ -> 試合数
+        self.history = {}       # "yyyy/mm" -> その月の最後の試合後の自チームのレーティング
+        self.last = None        # 最後に反映した試合の並び順
+        self.dirty = False      # 途中の試合が増減したので再計算が必要
+
+    def rating(self, team):
+        if team is None:
+            return self.us
+        return self.enemies.get(team, INITIAL_RATING)
+
+    # 1試合分の更新（4チーム戦は全ペアの対戦として K を按分する）
+    def apply(self, table, row):
+        teams = teams_of(table, row)
+        k = K_FACTOR / (len(teams) - 1)
+        before = [self.rating(team) for team, _ in teams]
+
+        for i, (team, score) in enumerate(teams):
+            delta = 0.0
+            for j, (_, other) in enumerate(teams):
+                if i != j:
+                    delta += k * (POINTS[judge(score, other)] - expected(before[i], before[j]))
+
+            if team is None:
+                self.us = before[i] + delta
+            else:
+                self.enemies[team] = before[i] + delta
+                self.games[team] = self.games.get(team, 0) + 1
+
+        self.history[month_of(row)] = self.us
+        self.last = play_order(row)
+
+
+# 敵チームとの相対的な強さ（ミラーの追加に合わせて差分更新する）
+class Ratings(MirrorListener):
+    """
+    Elo は試合順に依存するので、最新の試合の追加だけを差分で反映する。
+    過去日時の登録や削除があった場合は dirty にしておき、
+    次に参照されたときに一度だけミラーの内容から計算し直す。
+    """
+
+    def __init__(self, result_mirror=mirror):
+        self.mirror = result_mirror
+        self.tables = {table: TableRating() for table in ENEMY_COLUMNS}
+
+    @staticmethod
+    def _replay(table, rows):
+        rating = TableRating()
+        for row in sorted(rows, key=play_order):
+            rating.apply(table, row)
+        return rating
+
+    # ResultMirror の listener
+    def build(self, table, rows):
+        return self._replay(table, rows)
+
+    def install(self, table, rating):
+        self.tables[table] = rating
+
+    def on_add(self, table, row):
+        rating = self.tables[table]
+        if rating.dirty or (rating.last is not None and play_order(row) < rating.last):
+            rating.dirty = True
+        else:
+            rating.apply(table, row)
+
+    def on_remove(self, table, row):
+        self.tables[table].dirty = True
+
+    # 参照（必要なら再計算してから返す）
+    def get(self, table):
+        rating = self.tables[table]
+        if rating.dirty:
+            rows = self.mirror.tables[table].rows.values()
+            rating = self.tables[table] = self._replay(table, rows)
+        return rating
+
+
+ratings = Ratings()
+mirror.add_listener(ratings)
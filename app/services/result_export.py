@@ -0,0 +1,65 @@
+import csv
+import gzip
+import io
+import json
+
+# 1回のDBアクセスで取得する件数
+EXPORT_BATCH = 500
+
+# 出力する列（テーブルごと）
+EXPORT_COLUMNS = {
+    "result_12": [
+        "result_id", "date", "played_at", "player", "my_score", "enemy", "enemy_score",
+    ],
+    "result_24": [
+        "result_id", "date", "played_at", "player", "my_score",
+        "enemy1", "score1", "enemy2", "score2", "enemy3", "score3", "rank",
+    ],
+}
+
+
+# 条件に合う行をページ単位で順に返す（result_id 昇順）
+async def iter_results(database, table, member=None, enemy=None,
+                       since=None, until=None, batch=EXPORT_BATCH):
+    last_id = 0
+    while True:
+        rows = await database.fetch_results(
+            table, member, enemy, since, until, after=last_id, limit=batch
+        )
+        for row in rows:
+            yield row
+
+        if len(rows) < batch:
+            break
+        last_id = rows[-1]["result_id"]
+
+
+# gzip 圧縮した CSV / JSON を fileobj に書き出し、件数を返す
+async def export_results(database, fileobj, table, fmt="csv", **filters):
+    columns = EXPORT_COLUMNS[table]
+    count = 0
+
+    with gzip.GzipFile(fileobj=fileobj, mode="wb") as gz:
+        out = io.TextIOWrapper(gz, encoding="utf-8", newline="")
+
+        if fmt == "json":
+            out.write("[")
+            async for row in iter_results(database, table, **filters):
+                out.write("," if count else "")
+                out.write("\n" + json.dumps(
+                    {c: row[c] for c in columns}, ensure_ascii=False
+                ))
+                count += 1
+            out.write("\n]\n")
+        else:
+            writer = csv.writer(out)
+            writer.writerow(columns)
+            async for row in iter_results(database, table, **filters):
+                writer.writerow([row[c] for c in columns])
+                count += 1
+
+        out.flush()
+        out.detach()
+
+    fileobj.seek(0)
+    return count
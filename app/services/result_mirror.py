@@ -0,0 +1,442 @@
+import asyncio
+import bisect
+import itertools
+import os
+import time
+import weakref
+from abc import ABC, abstractmethod
+from array import array
+from services.database import db
+from services.storage import ENEMY_COLUMNS
+
+# 差分同期の間隔（秒）：これより古ければ読み込み前に追いつく
+SYNC_INTERVAL = float(os.getenv("MIRROR_SYNC_INTERVAL", "300"))
+# 全件再同期の間隔（秒）：他所での削除・修正を取り込む
+FULL_SYNC_INTERVAL = float(os.getenv("MIRROR_FULL_SYNC_INTERVAL", str(6 * 3600)))
+# 同期時に1回で取得する件数
+SYNC_BATCH = 1000
+
+
+# ミラーの内容が変わるたびに振る番号（スナップショットの共有キー）
+_versions = itertools.count(1)
+
+
+# 絞り込み結果の result_id 一覧（同じ条件のビュー同士で共有する読み取り専用の値）
+class ResultSnapshot:
+    __slots__ = ("table", "ids", "__weakref__")
+
+    def __init__(self, table, ids):
+        self.table = table
+        self.ids = array("q", ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+
+# 試合の並び順（日時、同時刻は登録順）
+def play_order(row):
+    return (row["date"], row["result_id"])
+
+
+# ResultMirror の購読者（listener）の共通インターフェース
+class MirrorListener(ABC):
+    """
+    build は全件から新しい状態を作るだけの処理で、別スレッドから呼ばれるため
+    listener 自身の状態に触れてはいけない。install はイベントループ上で
+    その状態に差し替える。on_add / on_remove は1行ずつの差分更新。
+    """
+
+    @abstractmethod
+    def build(self, table, rows):
+        """全件から作った新しい状態"""
+
+    @abstractmethod
+    def install(self, table, state):
+        """build の結果に差し替える"""
+
+    def reset(self, table, rows):
+        """全件から作り直す"""
+        self.install(table, self.build(table, rows))
+
+    @abstractmethod
+    def on_add(self, table, row):
+        """1行追加"""
+
+    @abstractmethod
+    def on_remove(self, table, row):
+        """1行削除"""
+
+
+# 昇順リスト同士の共通部分（短い方を基準に二分探索）
+def intersect_sorted(a, b):
+    if len(a) > len(b):
+        a, b = b, a
+
+    result = []
+    lo = 0
+    for x in a:
+        lo = bisect.bisect_left(b, x, lo)
+        if lo == len(b):
+            break
+        if b[lo] == x:
+            result.append(x)
+    return result
+
+
+# 昇順リストへの追加（末尾追加がほとんどなので先に判定）
+def _insort_id(ids, result_id):
+    if not ids or ids[-1] < result_id:
+        ids.append(result_id)
+    else:
+        bisect.insort(ids, result_id)
+
+
+# インデックスへの追加・削除
+def _index_add(index, key, result_id):
+    _insort_id(index.setdefault(key, []), result_id)
+
+
+def _index_remove(index, key, result_id):
+    ids = index.get(key)
+    if not ids:
+        return
+    i = bisect.bisect_left(ids, result_id)
+    if i < len(ids) and ids[i] == result_id:
+        del ids[i]
+    if not ids:
+        del index[key]
+
+
+# 1テーブル分のミラー
+class TableMirror:
+    def __init__(self, table):
+        self.table = table
+        self.rows = {}          # result_id -> 行
+        self.ids = []           # result_id 昇順
+        self.by_member = {}     # メンバー名 -> result_id 昇順
+        self.by_enemy = {}      # 敵チームタグ -> result_id 昇順
+        self.by_time = []       # (played_at, result_id) 昇順
+        self.watermark = 0      # 取り込み済みの最大 result_id
+        self.version = next(_versions)
+        self.synced_at = None
+        self.full_synced_at = None
+
+    def _keys(self, row):
+        member_keys = set(row["player"].split())
+        enemy_keys = {row[c] for c in ENEMY_COLUMNS[self.table]}
+        return member_keys, enemy_keys
+
+    @staticmethod
+    def _time_key(row):
+        return (row.get("played_at") or "", row["result_id"])
+
+    def add(self, row):
+        result_id = row["result_id"]
+        if result_id in self.rows:
+            self.remove(result_id)
+
+        _insort_id(self.ids, result_id)
+        self.rows[result_id] = row
+        bisect.insort(self.by_time, self._time_key(row))
+
+        member_keys, enemy_keys = self._keys(row)
+        for name in member_keys:
+            _index_add(self.by_member, name, result_id)
+        for enemy in enemy_keys:
+            _index_add(self.by_enemy, enemy, result_id)
+
+        self.watermark = max(self.watermark, result_id)
+        self.version = next(_versions)
+
+    def remove(self, result_id):
+        row = self.rows.pop(result_id, None)
+        if row is None:
+            return None
+
+        i = bisect.bisect_left(self.ids, result_id)
+        del self.ids[i]
+        i = bisect.bisect_left(self.by_time, self._time_key(row))
+        del self.by_time[i]
+
+        member_keys, enemy_keys = self._keys(row)
+        for name in member_keys:
+            _index_remove(self.by_member, name, result_id)
+        for enemy in enemy_keys:
+            _index_remove(self.by_enemy, enemy, result_id)
+
+        self.version = next(_versions)
+        return row
+
+    # played_at が since 以上 until 未満の result_id（昇順）
+    def _time_range_ids(self, since=None, until=None):
+        lo = bisect.bisect_left(self.by_time, (since,)) if since else 0
+        hi = bisect.bisect_left(self.by_time, (until,)) if until else len(self.by_time)
+        return sorted(result_id for _, result_id in self.by_time[lo:hi])
+
+    # 条件に合う result_id（昇順）
+    def select_ids(self, member=None, enemy=None, since=None, until=None):
+        candidates = []
+        if member:
+            candidates.append(self.by_member.get(member, []))
+        if enemy:
+            candidates.append(self.by_enemy.get(enemy, []))
+        if since or until:
+            candidates.append(self._time_range_ids(since, until))
+
+        if not candidates:
+            return self.ids
+
+        # 短いものから順に絞り込む
+        candidates.sort(key=len)
+        ids = candidates[0]
+        for other in candidates[1:]:
+            ids = intersect_sorted(ids, other)
+        return ids
+
+
+# 戦績テーブルのローカルミラー（読み込みをメモリ上で返す）
+class ResultMirror:
+    """
+    result_12 / result_24 をメモリに保持し、result_id の
+    ウォーターマークで差分同期する。登録・削除時は呼び出し側が
+    add / remove でミラーも更新する。
+    読み込み API は Storage と同じ形なので、そのまま差し替えられる。
+
+    集計などの購読者（MirrorListener）には行の追加・削除を通知する。
+    全件同期では build を別スレッドで呼んで新しい状態を作り、
+    イベントループ上で install して差し替える（build は listener 自身の
+    状態に触れてはいけない）。作り直している間の追加・削除は控えておき、
+    差し替えたあとに新しいミラーへもう一度反映する。
+
+    定期的な全件同期は start() で動かすバックグラウンドのタスクが行い、
+    読み込み時の ensure() は初回の全件同期と差分同期だけを行う。
+
+    削除は受付時点でミラーから消すが、DB から消えるのは書き込みキューが
+    反映してからになる。その間の同期で行が戻らないよう、反映待ちの削除
+    （watch_pending_deletes で登録）は同期で取得した行から除く。
+    """
+
+    def __init__(self, database=db):
+        self.db = database
+        self.tables = {table: TableMirror(table) for table in ENEMY_COLUMNS}
+        self.listeners = []
+        self._locks = {table: asyncio.Lock() for table in ENEMY_COLUMNS}
+        # 全件同期中のテーブル -> その間の追加・削除
+        self._buffers = {}
+        self._task = None
+        # 反映待ちの削除の参照元（table -> result_id の集合）
+        self._pending_deletes = None
+        # 使われている間だけ残るスナップショットのキャッシュ
+        self._snapshots = weakref.WeakValueDictionary()
+
+    # 購読者の登録（同期済みのテーブルは現在の内容で初期化する）
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+        for table, mirror in self.tables.items():
+            if mirror.full_synced_at is not None:
+                listener.reset(table, [mirror.rows[i] for i in mirror.ids])
+
+    # 反映待ちの削除の参照元を登録する（書き込みキューが呼ぶ）
+    def watch_pending_deletes(self, source):
+        self._pending_deletes = source
+
+    # 同期で取得した行から反映待ちの削除を除く
+    def _without_pending_deletes(self, table, rows):
+        if self._pending_deletes is None:
+            return rows
+        deleted = self._pending_deletes(table)
+        if not deleted:
+            return rows
+        return [row for row in rows if row["result_id"] not in deleted]
+
+    def _add_row(self, table, mirror, row):
+        old = mirror.remove(row["result_id"])
+        if old is not None:
+            for listener in self.listeners:
+                listener.on_remove(table, old)
+
+        mirror.add(row)
+        for listener in self.listeners:
+            listener.on_add(table, row)
+
+    def _remove_row(self, table, mirror, result_id):
+        row = mirror.remove(result_id)
+        if row is not None:
+            for listener in self.listeners:
+                listener.on_remove(table, row)
+        return row
+
+    # 全件分のミラーと listener の状態を作る（別スレッドで実行する）
+    @staticmethod
+    def _rebuild(table, rows, listeners):
+        fresh = TableMirror(table)
+        for row in rows:
+            fresh.add(row)
+        rows = [fresh.rows[i] for i in fresh.ids]
+        return fresh, [listener.build(table, rows) for listener in listeners]
+
+    # 差分同期（full=True なら全件取り直し）
+    async def sync(self, table, full=False):
+        before = self.tables[table]
+        seen = before.full_synced_at if full else before.synced_at
+
+        async with self._locks[table]:
+            # ロック待ちの間に他の呼び出しが同期を済ませていれば何もしない
+            mirror = self.tables[table]
+            done = mirror.full_synced_at if full else mirror.synced_at
+            if done is not None and done != seen:
+                return
+
+            now = time.monotonic()
+            if full or mirror.full_synced_at is None:
+                await self._full_sync(table, now)
+                return
+
+            while True:
+                rows = await self.db.fetch_results(
+                    table, after=mirror.watermark, limit=SYNC_BATCH
+                )
+                for row in self._without_pending_deletes(table, rows):
+                    self._add_row(table, mirror, row)
+                if len(rows) < SYNC_BATCH:
+                    break
+                # 最後の行を除いた場合も次の取得位置は進める
+                mirror.watermark = max(mirror.watermark, rows[-1]["result_id"])
+            mirror.synced_at = now
+
+    async def _full_sync(self, table, now):
+        self._buffers[table] = []
+        try:
+            rows = []
+            while True:
+                batch = await self.db.fetch_results(
+                    table, after=rows[-1]["result_id"] if rows else 0,
+                    limit=SYNC_BATCH
+                )
+                rows += batch
+                if len(batch) < SYNC_BATCH:
+                    break
+
+            # 取得後に受け付けた削除はバッファから反映される
+            rows = self._without_pending_deletes(table, rows)
+            listeners = list(self.listeners)
+            fresh, states = await asyncio.to_thread(
+                self._rebuild, table, rows, listeners
+            )
+        finally:
+            buffered = self._buffers.pop(table)
+
+        # ここから先は await しないので、差し替えと反映の間に割り込まれない
+        fresh.synced_at = fresh.full_synced_at = now
+        self.tables[table] = fresh
+        for listener, state in zip(listeners, states):
+            listener.install(table, state)
+        for op, value in buffered:
+            if op == "add":
+                self._add_row(table, fresh, value)
+            else:
+                self._remove_row(table, fresh, value)
+
+    async def sync_all(self, full=False):
+        for table in self.tables:
+            await self.sync(table, full=full)
+
+    # 古くなっていれば同期してからテーブルを返す（全件同期は初回だけ）
+    async def ensure(self, table):
+        mirror = self.tables[table]
+
+        if mirror.full_synced_at is None:
+            await self.sync(table, full=True)
+        elif time.monotonic() - mirror.synced_at > SYNC_INTERVAL:
+            await self.sync(table)
+
+        return self.tables[table]
+
+    # 定期的な全件同期（他所での削除・修正を取り込む）
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(FULL_SYNC_INTERVAL)
+            for table in self.tables:
+                try:
+                    await self.sync(table, full=True)
+                except Exception as e:
+                    print(f"[mirror] 定期全件同期失敗: {e}")
+
+    # 登録・削除の反映
+    def add(self, table, row):
+        self._add_row(table, self.tables[table], row)
+        if table in self._buffers:
+            self._buffers[table].append(("add", row))
+
+    def remove(self, table, result_id):
+        row = self._remove_row(table, self.tables[table], result_id)
+        if table in self._buffers:
+            self._buffers[table].append(("remove", result_id))
+        return row
+
+    async def count_results(
+        self, table, member=None, enemy=None, since=None, until=None
+    ):
+        mirror = await self.ensure(table)
+        return len(mirror.select_ids(member, enemy, since, until))
+
+    async def fetch_results(
+        self, table, member=None, enemy=None, since=None, until=None,
+        before=None, after=None, limit=20
+    ):
+        mirror = await self.ensure(table)
+        ids = mirror.select_ids(member, enemy, since, until)
+
+        if after is not None:
+            start = bisect.bisect_right(ids, after)
+            page = ids[start:start + limit]
+        else:
+            end = len(ids) if before is None else bisect.bisect_left(ids, before)
+            page = ids[max(0, end - limit):end]
+
+        return [mirror.rows[result_id] for result_id in page]
+
+    # 絞り込み結果のスナップショット（同じ条件・同じ版なら同じものを返す）
+    async def snapshot(
+        self, table, member=None, enemy=None, since=None, until=None
+    ):
+        mirror = await self.ensure(table)
+        key = (table, member, enemy, since, until, mirror.version)
+
+        snapshot = self._snapshots.get(key)
+        if snapshot is None:
+            snapshot = ResultSnapshot(
+                table, mirror.select_ids(member, enemy, since, until)
+            )
+            self._snapshots[key] = snapshot
+        return snapshot
+
+    # result_id の並びから行を引く（削除済みのものは飛ばす）
+    def rows_for(self, table, ids):
+        rows = self.tables[table].rows
+        return [rows[i] for i in ids if i in rows]
+
+    async def fetch_result(self, table, result_id):
+        mirror = await self.ensure(table)
+        row = mirror.rows.get(result_id)
+        if row is None and result_id > mirror.watermark:
+            # 他所で登録された直後の可能性があるので追いつく
+            await self.sync(table)
+            row = self.tables[table].rows.get(result_id)
+        return row
+
+
+mirror = ResultMirror()
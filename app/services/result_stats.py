@@ -0,0 +1,108 @@
+from collections import Counter
+from services.result_mirror import MirrorListener, mirror
+from services.storage import ENEMY_COLUMNS
+
+
+# 点数の比較（my 側から見た Win/Draw/Lose）
+def judge(my, enemy):
+    if my > enemy:
+        return "Win"
+    if my < enemy:
+        return "Lose"
+    return "Draw"
+
+
+# 勝敗の点数（引き分けは 0.5 勝）
+POINTS = {"Win": 1.0, "Draw": 0.5, "Lose": 0.0}
+
+
+# 1試合の結果（6v6 は Win/Draw/Lose、24人戦は順位）
+def outcome(table, row):
+    if table == "result_12":
+        return judge(row["my_score"], row["enemy_score"])
+    return row["rank"]
+
+
+# 集計キー（date は "yyyy/mm/dd hh" 形式）
+def month_of(row):
+    return row["date"][:7]
+
+
+# 1テーブル分の集計カウンタ
+class TableStats:
+    def __init__(self):
+        self.total = Counter()
+        self.by_member = {}     # メンバー名 -> Counter
+        self.by_enemy = {}      # 敵チームタグ -> Counter
+        self.by_month = {}      # "yyyy/mm" -> Counter
+
+
+# 勝敗・順位の集計（ミラーの追加・削除に合わせて差分更新する）
+class ResultStats(MirrorListener):
+    def __init__(self):
+        self.tables = {table: TableStats() for table in ENEMY_COLUMNS}
+
+    def _apply(self, table, row, delta):
+        self._apply_to(self.tables[table], table, row, delta)
+
+    @classmethod
+    def _apply_to(cls, stats, table, row, delta):
+        key = outcome(table, row)
+
+        cls._count(stats.total, key, delta)
+
+        targets = [(stats.by_month, month_of(row))]
+        targets += [(stats.by_member, name) for name in set(row["player"].split())]
+        targets += [
+            (stats.by_enemy, enemy)
+            for enemy in {row[c] for c in ENEMY_COLUMNS[table]}
+        ]
+
+        for index, index_key in targets:
+            counter = index.setdefault(index_key, Counter())
+            cls._count(counter, key, delta)
+            # 空になった集計は消す
+            if not counter:
+                del index[index_key]
+
+    @staticmethod
+    def _count(counter, key, delta):
+        counter[key] += delta
+        if counter[key] <= 0:
+            del counter[key]
+
+    # ResultMirror の listener
+    def build(self, table, rows):
+        stats = TableStats()
+        for row in rows:
+            self._apply_to(stats, table, row, 1)
+        return stats
+
+    def install(self, table, stats):
+        self.tables[table] = stats
+
+    def on_add(self, table, row):
+        self._apply(table, row, 1)
+
+    def on_remove(self, table, row):
+        self._apply(table, row, -1)
+
+    # 集計の取得（該当なしなら空の Counter）
+    def total(self, table):
+        return self.tables[table].total
+
+    def member(self, table, name):
+        return self.tables[table].by_member.get(name, Counter())
+
+    def enemy(self, table, enemy):
+        return self.tables[table].by_enemy.get(enemy, Counter())
+
+    def month(self, table, month):
+        return self.tables[table].by_month.get(month, Counter())
+
+    def months(self, table):
+        return sorted(self.tables[table].by_month)
+
+
+result_stats = ResultStats()
+mirror.add_listener(result_stats)
@@ -0,0 +1,189 @@
+import asyncio
+import os
+import sqlite3
+import threading
+from db.init_db import db_path, init_schema
+from services.storage import ENEMY_COLUMNS, Storage, participants
+
+
+# 絞り込み条件（名前付きパラメータ :member / :enemy / :since / :until）
+def _filter_sql(table: str) -> str:
+    enemy_cols = ", ".join(ENEMY_COLUMNS[table])
+    return (
+        "(:member IS NULL OR result_id IN ("
+        "SELECT result_id FROM result_player "
+        f"WHERE result_table = '{table}' AND member = :member)) "
+        f"AND (:enemy IS NULL OR :enemy IN ({enemy_cols})) "
+        "AND (:since IS NULL OR played_at >= :since) "
+        "AND (:until IS NULL OR played_at < :until)"
+    )
+
+
+# ローカル SQLite バックエンド（オフライン動作・ベンチマーク用）
+class SqliteStorage(Storage):
+    """
+    sqlite3 は同期 API なので、1本の接続をロックで守りつつ
+    スレッドで実行してイベントループを止めないようにする。
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv("SQLITE_PATH", db_path)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        init_schema(self.conn)
+        self._lock = threading.Lock()
+
+    def _query(self, sql, params=(), write=False):
+        with self._lock:
+            cur = self.conn.execute(sql, params)
+            rows = [dict(r) for r in cur.fetchall()]
+            if write:
+                self.conn.commit()
+            return rows, cur.lastrowid
+
+    async def _run(self, sql, params=(), write=False):
+        return await asyncio.to_thread(self._query, sql, params, write)
+
+    # 複数の書き込みを1トランザクションで実行
+    def _transact(self, func):
+        with self._lock:
+            with self.conn:
+                return func(self.conn)
+
+    async def _run_transaction(self, func):
+        return await asyncio.to_thread(self._transact, func)
+
+    @staticmethod
+    def _check_table(table):
+        if table not in ENEMY_COLUMNS:
+            raise ValueError(f"不明なテーブル: {table}")
+
+    async def count_results(
+        self, table, member=None, enemy=None, since=None, until=None
+    ):
+        self._check_table(table)
+        rows, _ = await self._run(
+            f"SELECT count(*) AS n FROM {table} WHERE {_filter_sql(table)}",
+            {"member": member, "enemy": enemy, "since": since, "until": until}
+        )
+        return rows[0]["n"]
+
+    async def fetch_results(
+        self, table, member=None, enemy=None, since=None, until=None,
+        before=None, after=None, limit=20
+    ):
+        self._check_table(table)
+        params = {
+            "member": member, "enemy": enemy,
+            "since": since, "until": until, "limit": limit,
+        }
+        where = _filter_sql(table)
+
+        if after is not None:
+            params["after"] = after
+            rows, _ = await self._run(
+                f"SELECT * FROM {table} WHERE {where} "
+                "AND result_id > :after ORDER BY result_id LIMIT :limit",
+                params
+            )
+            return rows
+
+        params["before"] = before
+        rows, _ = await self._run(
+            f"SELECT * FROM {table} WHERE {where} "
+            "AND (:before IS NULL OR result_id < :before) "
+            "ORDER BY result_id DESC LIMIT :limit",
+            params
+        )
+        rows.reverse()
+        return rows
+
+    async def fetch_result(self, table, result_id):
+        self._check_table(table)
+        rows, _ = await self._run(
+            f"SELECT * FROM {table} WHERE result_id = ?", (result_id,)
+        )
+        return rows[0] if rows else None
+
+    async def insert_results(self, table, rows):
+        self._check_table(table)
+
+        def insert(conn):
+            inserted = []
+            for row in rows:
+                columns = sorted(row)
+                cur = conn.execute(
+                    f"INSERT INTO {table} ({', '.join(columns)}) "
+                    f"VALUES ({', '.join('?' for _ in columns)}) "
+                    "ON CONFLICT (request_key) DO NOTHING",
+                    [row[c] for c in columns]
+                )
+
+                # 同じ request_key が登録済み（再送）なら既存の行を返す
+                if cur.rowcount == 0:
+                    existing = conn.execute(
+                        f"SELECT * FROM {table} WHERE request_key = ?",
+                        (row["request_key"],)
+                    ).fetchone()
+                    inserted.append(dict(existing))
+                    continue
+
+                conn.executemany(
+                    "INSERT INTO result_player (result_table, result_id, member) "
+                    "VALUES (?, ?, ?)",
+                    [(table, cur.lastrowid, m) for m in participants(row)]
+                )
+                inserted.append({"result_id": cur.lastrowid, **row})
+            return inserted
+
+        return await self._run_transaction(insert)
+
+    async def delete_result(self, table, result_id):
+        self._check_table(table)
+        def delete(conn):
+            conn.execute(
+                "DELETE FROM result_player WHERE result_table = ? AND result_id = ?",
+                (table, result_id)
+            )
+            conn.execute(f"DELETE FROM {table} WHERE result_id = ?", (result_id,))
+
+        await self._run_transaction(delete)
+
+    async def upsert_vr(self, user_id, vr):
+        await self._run(
+            "INSERT INTO user_vr (user_id, vr) VALUES (?, ?) "
+            "ON CONFLICT (user_id) DO UPDATE SET vr = excluded.vr",
+            (user_id, vr),
+            write=True
+        )
+
+    async def fetch_vr(self, user_id):
+        rows, _ = await self._run(
+            "SELECT vr FROM user_vr WHERE user_id = ?", (user_id,)
+        )
+        return rows[0]["vr"] if rows else None
+
+    async def fetch_vrs(self, user_ids):
+        user_ids = list(user_ids)
+        if not user_ids:
+            return []
+        rows, _ = await self._run(
+            "SELECT user_id, vr FROM user_vr WHERE user_id IN "
+            f"({', '.join('?' for _ in user_ids)})",
+            user_ids
+        )
+        return rows
+
+    async def fetch_members(self):
+        rows, _ = await self._run(
+            "SELECT name, discord_id, aliases FROM member"
+        )
+        return rows
+
+    async def ping(self):
+        await self._run("SELECT 1")
+
+    async def close(self):
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,77 @@
+from abc import ABC, abstractmethod
+
+# 戦績テーブルと enemy フィルタの対象列
+ENEMY_COLUMNS = {
+    "result_12": ("enemy",),
+    "result_24": ("enemy1", "enemy2", "enemy3"),
+}
+
+
+# 出場メンバー（result_player に書き込む内容）
+def participants(row) -> list[str]:
+    return list(dict.fromkeys(row["player"].split()))
+
+
+# 戦績・VR を保存するストレージの共通インターフェース
+class Storage(ABC):
+    """
+    Supabase / Postgres / SQLite の各バックエンドはこのクラスを継承する。
+    戦績の行は dict で受け渡し、一覧は result_id 昇順で返す。
+    played_at は ISO 形式の文字列（"yyyy-mm-ddThh:00:00"）で扱い、
+    since 以上 until 未満で絞り込む。
+    request_key（冪等キー）付きの行は、同じキーが登録済みなら
+    新たに登録せず既存の行を返す。
+    登録・削除時は出場メンバーの result_player も合わせて更新する。
+    """
+
+    @abstractmethod
+    async def count_results(
+        self, table, member=None, enemy=None, since=None, until=None
+    ):
+        """絞り込み後の件数"""
+
+    @abstractmethod
+    async def fetch_results(
+        self, table, member=None, enemy=None, since=None, until=None,
+        before=None, after=None, limit=20
+    ):
+        """after より後 / before より前の limit 件（result_id 昇順）"""
+
+    @abstractmethod
+    async def fetch_result(self, table, result_id):
+        """1件取得（なければ None）"""
+
+    @abstractmethod
+    async def insert_results(self, table, rows):
+        """まとめて1トランザクションで登録し、result_id 付きの行を返す"""
+
+    async def insert_result(self, table, row):
+        """登録して result_id 付きの行を返す"""
+        return (await self.insert_results(table, [row]))[0]
+
+    @abstractmethod
+    async def delete_result(self, table, result_id):
+        """1件削除"""
+
+    @abstractmethod
+    async def upsert_vr(self, user_id, vr):
+        """VR登録・更新"""
+
+    @abstractmethod
+    async def fetch_vr(self, user_id):
+        """VR取得（なければ None）"""
+
+    @abstractmethod
+    async def fetch_vrs(self, user_ids):
+        """[{"user_id", "vr"}, ...]"""
+
+    @abstractmethod
+    async def fetch_members(self):
+        """[{"name", "discord_id", "aliases"}, ...]（aliases はカンマ区切り）"""
+
+    @abstractmethod
+    async def ping(self):
+        """疎通確認"""
+
+    async def close(self):
+        """後片付け（必要なバックエンドのみ）"""
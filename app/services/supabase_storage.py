@@ -0,0 +1,164 @@
+import asyncio
+from services.storage import ENEMY_COLUMNS, Storage, participants
+
+
+# 同期クエリをスレッドで実行する
+async def execute(query):
+    return await asyncio.to_thread(query.execute)
+
+
+# 絞り込み条件をクエリに付与
+def apply_result_filters(
+    query, table: str, member=None, enemy=None, since=None, until=None
+):
+    if member:
+        # REST では result_player と結合できないので、
+        # player（スペース区切り）を単語単位で一致させる
+        query = query.or_(
+            f'player.eq."{member}",'
+            f'player.like."{member} *",'
+            f'player.like."* {member}",'
+            f'player.like."* {member} *"'
+        )
+
+    if enemy:
+        query = query.or_(
+            ",".join(f'{col}.eq."{enemy}"' for col in ENEMY_COLUMNS[table])
+        )
+
+    # 日時範囲（since 以上 until 未満）
+    if since:
+        query = query.gte("played_at", since)
+    if until:
+        query = query.lt("played_at", until)
+
+    return query
+
+
+# Supabase(REST) バックエンド
+class SupabaseStorage(Storage):
+    def __init__(self, client=None):
+        if client is None:
+            from services.supabase import supabase
+            client = supabase
+        self.client = client
+
+    async def count_results(
+        self, table, member=None, enemy=None, since=None, until=None
+    ):
+        query = self.client.table(table).select(
+            "result_id", count="exact", head=True
+        )
+        res = await execute(
+            apply_result_filters(query, table, member, enemy, since, until)
+        )
+        return res.count or 0
+
+    async def fetch_results(
+        self, table, member=None, enemy=None, since=None, until=None,
+        before=None, after=None, limit=20
+    ):
+        query = apply_result_filters(
+            self.client.table(table).select("*"),
+            table, member, enemy, since, until
+        )
+
+        if after is not None:
+            query = query.gt("result_id", after).order("result_id")
+        else:
+            if before is not None:
+                query = query.lt("result_id", before)
+            query = query.order("result_id", desc=True)
+
+        rows = (await execute(query.limit(limit))).data
+
+        if after is None:
+            rows.reverse()
+        return rows
+
+    async def fetch_result(self, table, result_id):
+        query = self.client.table(table).select("*").eq("result_id", result_id)
+        rows = (await execute(query)).data
+        return rows[0] if rows else None
+
+    async def insert_results(self, table, rows):
+        # 1リクエストの一括 INSERT は1文なので全件まとめて成功・失敗する
+        # 登録済みの request_key（再送）は飛ばし、新しく入った行だけが返る
+        created = (await execute(
+            self.client.table(table).upsert(
+                rows, on_conflict="request_key", ignore_duplicates=True
+            )
+        )).data
+
+        created_keys = {row.get("request_key") for row in created}
+        missing = [
+            row["request_key"] for row in rows
+            if row.get("request_key") and row["request_key"] not in created_keys
+        ]
+        results = created
+        if missing:
+            query = self.client.table(table).select("*").in_("request_key", missing)
+            results = created + (await execute(query)).data
+
+        # result_player とは別リクエストなので、戦績 → 出場メンバーの順に書く
+        # 前回は戦績だけ入って失敗した再送もあるので、登録済みで返ってきた行も含めて
+        # 全件書く（主キー衝突は無視するので何度書いても重複しない）
+        players = [
+            {"result_table": table, "result_id": row["result_id"], "member": m}
+            for row in results
+            for m in participants(row)
+        ]
+        if players:
+            await execute(
+                self.client.table("result_player").upsert(
+                    players,
+                    on_conflict="result_table,result_id,member",
+                    ignore_duplicates=True
+                )
+            )
+        return results
+
+    async def delete_result(self, table, result_id):
+        await execute(
+            self.client.table("result_player")
+            .delete()
+            .eq("result_table", table)
+            .eq("result_id", result_id)
+        )
+        await execute(
+            self.client.table(table).delete().eq("result_id", result_id)
+        )
+
+    async def upsert_vr(self, user_id, vr):
+        await execute(
+            self.client.table("user_vr").upsert(
+                {"user_id": user_id, "vr": vr},
+                on_conflict="user_id"
+            )
+        )
+
+    async def fetch_vr(self, user_id):
+        query = (
+            self.client.table("user_vr")
+            .select("vr")
+            .eq("user_id", user_id)
+            .limit(1)
+        )
+        rows = (await execute(query)).data
+        return rows[0]["vr"] if rows else None
+
+    async def fetch_vrs(self, user_ids):
+        query = (
+            self.client.table("user_vr")
+            .select("user_id, vr")
+            .in_("user_id", user_ids)
+        )
+        return (await execute(query)).data
+
+    async def fetch_members(self):
+        query = self.client.table("member").select("name, discord_id, aliases")
+        return (await execute(query)).data
+
+    async def ping(self):
+        # 実在する & 行数の少ないテーブル
+        await execute(self.client.table("user_vr").select("vr").limit(1))
@@ -0,0 +1,269 @@
+import heapq
+from collections import deque
+from typing import NamedTuple
+import jaconv
+
+# あいまい検索で返す候補数
+FUZZY_LIMIT = 5
+# 候補として返す類似度の下限（0〜1）
+FUZZY_MIN_SIMILARITY = 0.3
+
+
+# 入力文字列を小文字・カタカナ統一・全角半角吸収
+def normalize(s: str) -> str:
+    s = s.strip().lower()            # 前後スペース除去＆小文字化
+    s = jaconv.hira2kata(s)          # ひらがな → カタカナ
+    s = jaconv.z2h(s, kana=False, digit=True, ascii=True)  # 全角数字・英字 → 半角
+    return s
+
+
+# 文字 bigram（前後に境界記号を付けて1文字の別名も拾えるようにする）
+def bigrams(s: str) -> set[str]:
+    s = f"\0{s}\0"
+    return {s[i:i + 2] for i in range(len(s) - 1)}
+
+
+# 編集距離（別名は短いので素直な DP で十分）
+def edit_distance(a: str, b: str) -> int:
+    if len(a) < len(b):
+        a, b = b, a
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        prev = cur
+    return prev[-1]
+
+
+# 正規化済みの別名に対するあいまい検索
+class FuzzyIndex:
+    """
+    bigram の転置索引で共通部分のある別名だけを候補に絞り、
+    編集距離と bigram の Dice 係数で順位を付ける。
+    同じコースの別名は一番近いものだけを残す。
+    """
+
+    def __init__(self, aliases: dict):
+        # aliases: 正規化済みの別名 -> コース名
+        self.aliases = dict(aliases)
+        self.grams = {alias: bigrams(alias) for alias in self.aliases}
+        self.postings = {}      # bigram -> 別名の一覧
+        for alias, grams in self.grams.items():
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(alias)
+
+    # 類似度（1 で完全一致）
+    def similarity(self, query, query_grams, alias, shared):
+        distance = edit_distance(query, alias)
+        edit = 1 - distance / max(len(query), len(alias))
+        dice = 2 * shared / (len(query_grams) + len(self.grams[alias]))
+        return (edit + dice) / 2
+
+    # 近いコース名を類似度の高い順に返す [(コース名, 類似度)]
+    def search(self, query: str, limit=FUZZY_LIMIT):
+        query_grams = bigrams(query)
+        shared = {}
+        for gram in query_grams:
+            for alias in self.postings.get(gram, ()):
+                shared[alias] = shared.get(alias, 0) + 1
+
+        best = {}
+        for alias, count in shared.items():
+            score = self.similarity(query, query_grams, alias, count)
+            name = self.aliases[alias]
+            if score >= FUZZY_MIN_SIMILARITY and score > best.get(name, 0):
+                best[name] = score
+
+        return heapq.nlargest(limit, best.items(), key=lambda e: e[1])
+
+
+# 前方一致用のトライの節
+class TrieNode:
+    __slots__ = ("children", "names")
+
+    def __init__(self):
+        self.children = {}
+        self.names = []         # この節以下の別名が指すコース名（登録順・重複なし）
+
+
+# 正規化済みの別名の前方一致補完
+class PrefixTrie:
+    """
+    各節に配下のコース名を limit 件まで持たせておき、
+    補完は入力の長さ分だけ節をたどれば済むようにする。
+    """
+
+    def __init__(self, limit=25):
+        self.root = TrieNode()
+        self.limit = limit
+
+    def insert(self, alias: str, name: str):
+        node = self.root
+        self._add_name(node, name)
+        for ch in alias:
+            node = node.children.setdefault(ch, TrieNode())
+            self._add_name(node, name)
+
+    def _add_name(self, node, name):
+        if len(node.names) < self.limit and name not in node.names:
+            node.names.append(name)
+
+    def complete(self, prefix: str) -> list[str]:
+        node = self.root
+        for ch in prefix:
+            node = node.children.get(ch)
+            if node is None:
+                return []
+        return node.names
+
+
+# 接続を始点・終点のコース名（正規化済み）ごとにまとめる
+def group_connects(connects, field: str) -> dict:
+    groups = {}
+    for c in connects:
+        groups.setdefault(normalize(c[field]), []).append(c)
+    return groups
+
+
+# 接続グラフの全点対の最短経路（接続の本数が最小）
+class RouteTable:
+    """
+    始点 -> 終点の有向グラフとして、全コースから BFS を1回ずつ行い、
+    到達した各コースについて「最後に使った接続」を覚えておく。
+    経路はそこから始点までたどり直すだけで復元できる。
+    """
+
+    def __init__(self, connects):
+        self.adjacency = {}     # 正規化済みの始点 -> [(正規化済みの終点, 接続)]
+        for c in connects:
+            self.adjacency.setdefault(normalize(c["start"]), []).append(
+                (normalize(c["end"]), c)
+            )
+        # 正規化済みの始点 -> {正規化済みの到達先: 最後の接続}
+        self.parents = {src: self._bfs(src) for src in self.adjacency}
+
+    def _bfs(self, src):
+        parents = {}
+        queue = deque([src])
+        while queue:
+            node = queue.popleft()
+            for dst, c in self.adjacency.get(node, ()):
+                if dst != src and dst not in parents:
+                    parents[dst] = (node, c)
+                    queue.append(dst)
+        return parents
+
+    # 経路（接続の並び）。たどり着けなければ None
+    def route(self, start: str, end: str):
+        parents = self.parents.get(start)
+        if parents is None or end not in parents:
+            return None
+
+        path = []
+        node = end
+        while node != start:
+            node, c = parents[node]
+            path.append(c)
+        path.reverse()
+        return path
+
+
+# track.json の1件分の形式チェック（問題があれば理由を返す）
+def track_entry_error(entry):
+    if not isinstance(entry, dict):
+        return "オブジェクトではありません"
+    if not isinstance(entry.get("name"), str) or not entry["name"]:
+        return "name がありません"
+    if not isinstance(entry.get("image"), str):
+        return "image がありません"
+    aliases = entry.get("aliases", [])
+    if not isinstance(aliases, list) or not all(isinstance(a, str) for a in aliases):
+        return "aliases が文字列のリストではありません"
+    return None
+
+
+# track_connect.json の1件分の形式チェック（問題があれば理由を返す）
+def connect_entry_error(c):
+    if not isinstance(c, dict):
+        return "オブジェクトではありません"
+    for field in ("start", "end"):
+        if not isinstance(c.get(field), str) or not c[field]:
+            return f"{field} がありません"
+    return None
+
+
+# 全件の形式チェック（不正なものの一覧を返す）
+def _entry_errors(entries, file_name, entry_error):
+    if not isinstance(entries, list):
+        return [f"{file_name} はリストではありません"]
+    errors = []
+    for i, entry in enumerate(entries, 1):
+        error = entry_error(entry)
+        if error:
+            errors.append(f"{file_name} {i}件目: {error}")
+    return errors
+
+
+# track.json / track_connect.json の形式チェック（不正なら ValueError）
+def validate_tracks(tracks):
+    errors = _entry_errors(tracks, "track.json", track_entry_error)
+    if errors:
+        raise ValueError("\n".join(errors))
+
+
+def validate_connects(connects):
+    errors = _entry_errors(connects, "track_connect.json", connect_entry_error)
+    if errors:
+        raise ValueError("\n".join(errors))
+
+
+# 不正な件を除いた一覧（除いたものはログに出す）
+def valid_entries(entries, file_name, entry_error):
+    for error in _entry_errors(entries, file_name, entry_error):
+        print(f"[track] スキップ: {error}")
+    if not isinstance(entries, list):
+        return []
+    return [entry for entry in entries if entry_error(entry) is None]
+
+
+# コース・接続の検索用データ一式（作り直すときは丸ごと差し替える）
+class TrackData(NamedTuple):
+    track_dict: dict            # 正規化済みの別名 -> (コース名, 画像URL)
+    connects: list
+    fuzzy: FuzzyIndex
+    trie: PrefixTrie
+    connects_by_end: dict       # 正規化済みの終点 -> 接続
+    connects_by_start: dict     # 正規化済みの始点 -> 接続
+    routes: RouteTable
+
+
+def build_track_data(tracks, connects) -> TrackData:
+    validate_tracks(tracks)
+    validate_connects(connects)
+
+    track_dict = {}
+    for entry in tracks:
+        name = entry["name"]
+        image_url = entry["image"]
+        for alias in entry.get("aliases", []):
+            track_dict[normalize(alias)] = (name, image_url)
+        # コース名そのものでも引けるようにする
+        track_dict.setdefault(normalize(name), (name, image_url))
+
+    # 入力補完用のトライ
+    trie = PrefixTrie()
+    for alias, (name, _) in track_dict.items():
+        trie.insert(alias, name)
+
+    return TrackData(
+        track_dict=track_dict,
+        connects=connects,
+        # typo 用のあいまい検索索引
+        fuzzy=FuzzyIndex({alias: name for alias, (name, _) in track_dict.items()}),
+        trie=trie,
+        connects_by_end=group_connects(connects, "end"),
+        connects_by_start=group_connects(connects, "start"),
+        # 全コース間の経路
+        routes=RouteTable(connects),
+    )
@@ -0,0 +1,235 @@
+import asyncio
+import json
+import os
+import sqlite3
+import uuid
+from services.database import db
+from services.result_mirror import mirror
+
+# 書き込み待ちを保存するジャーナルファイル
+JOURNAL_FILE = os.getenv(
+    "WRITE_JOURNAL",
+    os.path.join(os.path.dirname(__file__), "..", "write_journal.jsonl")
+)
+# 再試行しても書けなかった書き込みの退避先
+DEAD_LETTER_FILE = os.getenv("WRITE_DEAD_LETTER", JOURNAL_FILE + ".dead")
+# データ不正で失敗した書き込みの試行回数の上限（超えたら退避して後続を先に進める）
+MAX_ATTEMPTS = int(os.getenv("WRITE_MAX_ATTEMPTS", "3"))
+# 1回の書き込みでまとめる件数
+FLUSH_BATCH = 100
+# 受付から書き込みまで待つ時間（秒）：連続した登録をまとめる
+FLUSH_DELAY = 0.5
+# 失敗時の再試行間隔（秒）
+RETRY_MIN = 1
+RETRY_MAX = 60
+
+
+# 再試行しても通らない SQLSTATE の分類（22: データ不正 / 23: 制約違反 / 42: 構文・定義）
+PERMANENT_SQLSTATE_CLASSES = ("22", "23", "42")
+
+
+# 再試行しても成功しないエラーか（接続エラー・タイムアウトなどは False）
+def is_permanent_error(error) -> bool:
+    # 行の内容の不正（asyncpg の引数の変換エラーも ValueError）
+    if isinstance(error, (ValueError, TypeError, KeyError)):
+        return True
+    if isinstance(error, (sqlite3.IntegrityError, sqlite3.DataError)):
+        return True
+    # asyncpg は sqlstate、Supabase（PostgREST）は code に SQLSTATE が入る
+    # （HTTP エラーの場合の code はステータスコードの数値なので対象外）
+    state = getattr(error, "sqlstate", None) or getattr(error, "code", None)
+    return isinstance(state, str) and state[:2] in PERMANENT_SQLSTATE_CLASSES
+
+
+# 戦績の書き込みキュー（ジャーナルに残してから非同期でDBに書く）
+class WriteQueue:
+    """
+    登録・削除はまずジャーナル（JSON Lines）に追記して fsync し、
+    その時点で受付完了とする。バックグラウンドのタスクが
+    まとめてDBに書き込み、成功した分をジャーナルから消す。
+    失敗した場合は間隔を延ばしながら再試行する。
+    登録には request_key を付けるので、再送しても二重登録にならない。
+
+    一度失敗した先頭の書き込みは1件ずつ試し直す。データ不正・制約違反で
+    MAX_ATTEMPTS 回失敗したものだけを退避ファイルに移して後続を先に進め、
+    接続エラーやタイムアウトは DB が戻るまで再試行を続ける（受付済みの
+    書き込みを失わないため）。
+    ジャーナルの書き込み（fsync）はイベントループを止めないよう別スレッドで行う。
+    """
+
+    def __init__(
+        self, database=db, result_mirror=mirror, path=JOURNAL_FILE,
+        dead_letter_path=DEAD_LETTER_FILE
+    ):
+        self.db = database
+        self.mirror = result_mirror
+        self.path = path
+        self.dead_letter_path = dead_letter_path
+        self.pending = []
+        self._wake = asyncio.Event()
+        self._task = None
+        # ジャーナルへの追記と置き換えが重ならないようにする
+        self._journal_lock = asyncio.Lock()
+
+    # 前回終了時に残っていた書き込み待ちを読み込む
+    def load(self):
+        self.pending = []
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    self.pending.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # 追記途中で落ちた最終行
+                    print(f"[write_queue] 壊れた行を無視: {line[:50]}")
+
+    @staticmethod
+    def _write_append(path, entry):
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    @staticmethod
+    def _write_replace(path, entries):
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    # 残りの書き込み待ちでジャーナルを置き換える
+    async def _rewrite(self):
+        async with self._journal_lock:
+            entries = list(self.pending)
+            await asyncio.to_thread(self._write_replace, self.path, entries)
+
+    async def _enqueue(self, entry):
+        async with self._journal_lock:
+            await asyncio.to_thread(self._write_append, self.path, entry)
+            self.pending.append(entry)
+        self._wake.set()
+
+    # 登録の受付（request_key を返す）
+    async def enqueue_insert(self, table, row):
+        key = uuid.uuid4().hex
+        await self._enqueue({"key": key, "op": "insert", "table": table, "row": row})
+        return key
+
+    # 削除の受付（表示からはすぐに消す）
+    async def enqueue_delete(self, table, result_id):
+        key = uuid.uuid4().hex
+        await self._enqueue({
+            "key": key, "op": "delete", "table": table, "result_id": result_id
+        })
+        self.mirror.remove(table, result_id)
+        return key
+
+    # 反映待ちの削除（ミラーの同期で行が戻らないように除く）
+    def pending_deletes(self, table):
+        return {
+            e["result_id"] for e in self.pending
+            if e["op"] == "delete" and e["table"] == table
+        }
+
+    def start(self):
+        if self._task is None:
+            self.mirror.watch_pending_deletes(self.pending_deletes)
+            self.load()
+            if self.pending:
+                self._wake.set()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        delay = RETRY_MIN
+        while True:
+            await self._wake.wait()
+            await asyncio.sleep(FLUSH_DELAY)
+            self._wake.clear()
+
+            try:
+                await self.flush()
+                delay = RETRY_MIN
+            except Exception as e:
+                print(f"[write_queue] 書き込み失敗（{delay}秒後に再試行）: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RETRY_MAX)
+                self._wake.set()
+
+    # 先頭から同じ種類・同じテーブルの書き込みをまとめて取り出す
+    # （失敗したことのある先頭は、原因を切り分けるため1件だけ）
+    def _next_batch(self):
+        first = self.pending[0]
+        batch = [first]
+        if first.get("attempts"):
+            return batch
+        for entry in self.pending[1:FLUSH_BATCH]:
+            if entry["op"] != first["op"] or entry["table"] != first["table"]:
+                break
+            batch.append(entry)
+        return batch
+
+    async def _apply(self, batch):
+        table = batch[0]["table"]
+
+        if batch[0]["op"] == "insert":
+            rows = [{**e["row"], "request_key": e["key"]} for e in batch]
+            for row in await self.db.insert_results(table, rows):
+                self.mirror.add(table, row)
+            return
+
+        for entry in batch:
+            await self.db.delete_result(table, entry["result_id"])
+            self.mirror.remove(table, entry["result_id"])
+
+    # 上限まで失敗した書き込みを退避ファイルに移す
+    async def _dead_letter(self, entry, error):
+        await asyncio.to_thread(
+            self._write_append, self.dead_letter_path, {**entry, "error": str(error)}
+        )
+        print(
+            f"[write_queue] {entry['attempts']}回失敗したため退避: "
+            f"{entry['op']} {entry['table']} key={entry['key']} -> {self.dead_letter_path}"
+        )
+
+    # 書き込み待ちを順にDBへ反映する
+    async def flush(self):
+        while self.pending:
+            batch = self._next_batch()
+            try:
+                await self._apply(batch)
+            except Exception as e:
+                for entry in batch:
+                    entry["attempts"] = entry.get("attempts", 0) + 1
+                if (
+                    len(batch) == 1
+                    and batch[0]["attempts"] >= MAX_ATTEMPTS
+                    and is_permanent_error(e)
+                ):
+                    await self._dead_letter(batch[0], e)
+                    del self.pending[0]
+                    await self._rewrite()
+                    continue
+                await self._rewrite()
+                raise
+            del self.pending[:len(batch)]
+            await self._rewrite()
+
+
+write_queue = WriteQueue()
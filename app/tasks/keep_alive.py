@@ -1,9 +1,9 @@
-from services.supabase import supabase
+from services.database import db
 
 async def keep_supabase_alive():
+    backend = type(db.backend).__name__
     try:
-        # 実在する & 行数の少ないテーブル
-        supabase.table("user_vr").select("vr").limit(1).execute()
-        print("[keep_alive] Supabase ping OK")
+        await db.ping()
+        print(f"[keep_alive] {backend} ping OK")
     except Exception as e:
-        print(f"[keep_alive] failed: {e}")
+        print(f"[keep_alive] {backend} failed: {e}")
@@ -0,0 +1,298 @@
+"""
+PostgresStorage のクエリのテスト
+
+    cd app
+    python -m unittest tests.test_postgres_storage
+
+通常は asyncpg のプールの代わりに、同じ SQL（$n::型 を ?n に置き換えただけ）を
+メモリ上の SQLite で実行する代役で動かす。
+POSTGRES_TEST_DSN に使い捨てのデータベースを指定すると、実際の Postgres でも
+同じテストを実行する（テーブルは作り直すので本番の DSN は指定しないこと）。
+"""
+import os
+import re
+import sqlite3
+import unittest
+from datetime import datetime
+from services.postgres_storage import PostgresStorage
+from db.init_db import init_schema
+
+TEST_DSN = os.getenv("POSTGRES_TEST_DSN")
+
+# 実際の Postgres に作るテーブル（Supabase 側と同じ構成）
+POSTGRES_SCHEMA = """
+DROP TABLE IF EXISTS result_12, result_24, result_player;
+CREATE TABLE result_12 (
+    result_id bigserial PRIMARY KEY,
+    player text NOT NULL,
+    my_score integer NOT NULL,
+    enemy text NOT NULL,
+    enemy_score integer NOT NULL,
+    date text NOT NULL,
+    played_at timestamp,
+    request_key text UNIQUE
+);
+CREATE TABLE result_24 (
+    result_id bigserial PRIMARY KEY,
+    player text NOT NULL,
+    my_score integer NOT NULL,
+    enemy1 text NOT NULL,
+    score1 integer NOT NULL,
+    enemy2 text NOT NULL,
+    score2 integer NOT NULL,
+    enemy3 text NOT NULL,
+    score3 integer NOT NULL,
+    rank integer NOT NULL,
+    date text NOT NULL,
+    played_at timestamp,
+    request_key text UNIQUE
+);
+CREATE TABLE result_player (
+    result_table text NOT NULL,
+    result_id bigint NOT NULL,
+    member text NOT NULL,
+    PRIMARY KEY (result_table, result_id, member)
+);
+"""
+
+# $1::text / $5::bigint などのプレースホルダ
+_PARAM = re.compile(r"\$(\d+)(?:::[a-z]+(?:\[\])?)?")
+
+
+# asyncpg の接続・プールの代役（必要なメソッドだけを SQLite で実装）
+class SqliteStandIn:
+    def __init__(self):
+        self.conn = sqlite3.connect(":memory:", isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        init_schema(self.conn)
+        self.executed = []
+
+    def _run(self, sql, args):
+        self.executed.append(sql)
+        args = [a.isoformat() if isinstance(a, datetime) else a for a in args]
+        return self.conn.execute(_PARAM.sub(r"?\1", sql), args)
+
+    async def fetch(self, sql, *args):
+        return self._run(sql, args).fetchall()
+
+    async def fetchrow(self, sql, *args):
+        return self._run(sql, args).fetchone()
+
+    async def fetchval(self, sql, *args):
+        row = self._run(sql, args).fetchone()
+        return row[0] if row else None
+
+    async def execute(self, sql, *args):
+        self._run(sql, args)
+
+    async def executemany(self, sql, args):
+        self.executed.append(sql)
+        self.conn.executemany(_PARAM.sub(r"?\1", sql), args)
+
+    def acquire(self):
+        return _Context(self)
+
+    def transaction(self):
+        return _Transaction(self.conn)
+
+    async def close(self):
+        self.conn.close()
+
+
+class _Context:
+    def __init__(self, value):
+        self.value = value
+
+    async def __aenter__(self):
+        return self.value
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class _Transaction:
+    def __init__(self, conn):
+        self.conn = conn
+
+    async def __aenter__(self):
+        self.conn.execute("BEGIN")
+
+    async def __aexit__(self, exc_type, *exc):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+def row12(player, enemy, hour, key=None, my_score=50, enemy_score=40):
+    played_at = f"2024-05-01T{hour:02d}:00:00"
+    return {
+        "player": player,
+        "my_score": my_score,
+        "enemy": enemy,
+        "enemy_score": enemy_score,
+        "date": f"2024/05/01 {hour:02d}",
+        "played_at": played_at,
+        "request_key": key or f"key-{player}-{enemy}-{hour}",
+    }
+
+
+def row24(player, hour, enemies=("AA", "BB", "CC")):
+    return {
+        "player": player,
+        "my_score": 300,
+        "enemy1": enemies[0], "score1": 280,
+        "enemy2": enemies[1], "score2": 260,
+        "enemy3": enemies[2], "score3": 240,
+        "rank": 1,
+        "date": f"2024/05/01 {hour:02d}",
+        "played_at": f"2024-05-01T{hour:02d}:00:00",
+        "request_key": f"key24-{player}-{hour}",
+    }
+
+
+# バックエンドに依存しないテスト本体
+class PostgresStorageCases:
+    async def asyncSetUp(self):
+        self.storage = await self.make_storage()
+        self.rows = await self.storage.insert_results("result_12", [
+            row12("たこ みる", "AA", 20),
+            row12("たこ あな", "BB", 21),
+            row12("みる あな", "AA", 22),
+            row12("たこ みる あな", "CC", 23),
+        ])
+        self.ids = [r["result_id"] for r in self.rows]
+
+    async def asyncTearDown(self):
+        await self.storage.close()
+
+    async def players(self, table, result_id):
+        pool = await self.storage.get_pool()
+        records = await pool.fetch(
+            "SELECT member FROM result_player WHERE result_table = $1 AND result_id = $2",
+            table, result_id
+        )
+        return sorted(r["member"] for r in records)
+
+    async def test_count(self):
+        count = self.storage.count_results
+        self.assertEqual(await count("result_12"), 4)
+        self.assertEqual(await count("result_12", member="たこ"), 3)
+        self.assertEqual(await count("result_12", enemy="AA"), 2)
+        self.assertEqual(await count("result_12", member="みる", enemy="AA"), 2)
+        self.assertEqual(await count("result_12", member="いない"), 0)
+        self.assertEqual(await count("result_24"), 0)
+
+    async def test_count_period(self):
+        count = self.storage.count_results
+        self.assertEqual(await count("result_12", since="2024-05-01T21:00:00"), 3)
+        self.assertEqual(await count("result_12", until="2024-05-01T21:00:00"), 1)
+        self.assertEqual(
+            await count(
+                "result_12", since="2024-05-01T21:00:00", until="2024-05-01T23:00:00"
+            ),
+            2
+        )
+
+    async def test_filters_on_enemy_columns_of_result_24(self):
+        await self.storage.insert_results("result_24", [
+            row24("たこ", 20, ("AA", "BB", "CC")),
+            row24("みる", 21, ("DD", "EE", "AA")),
+            row24("あな", 22, ("DD", "EE", "FF")),
+        ])
+        count = self.storage.count_results
+        self.assertEqual(await count("result_24", enemy="AA"), 2)
+        self.assertEqual(await count("result_24", enemy="FF"), 1)
+        self.assertEqual(await count("result_24", member="みる", enemy="AA"), 1)
+
+    async def test_page_before(self):
+        fetch = self.storage.fetch_results
+        # 最新ページ（before なし）は新しい limit 件を result_id 昇順で返す
+        page = await fetch("result_12", limit=3)
+        self.assertEqual([r["result_id"] for r in page], self.ids[1:])
+
+        page = await fetch("result_12", before=self.ids[1], limit=3)
+        self.assertEqual([r["result_id"] for r in page], self.ids[:1])
+
+        page = await fetch("result_12", member="あな", before=self.ids[3], limit=5)
+        self.assertEqual([r["result_id"] for r in page], [self.ids[1], self.ids[2]])
+
+    async def test_page_after(self):
+        fetch = self.storage.fetch_results
+        page = await fetch("result_12", after=self.ids[0], limit=2)
+        self.assertEqual([r["result_id"] for r in page], self.ids[1:3])
+
+        page = await fetch("result_12", enemy="AA", after=self.ids[0], limit=5)
+        self.assertEqual([r["result_id"] for r in page], [self.ids[2]])
+
+        self.assertEqual(await fetch("result_12", after=self.ids[-1]), [])
+
+    async def test_rows_use_iso_played_at(self):
+        row = await self.storage.fetch_result("result_12", self.ids[0])
+        self.assertEqual(row["played_at"], "2024-05-01T20:00:00")
+        self.assertEqual(row["player"], "たこ みる")
+        self.assertIsNone(await self.storage.fetch_result("result_12", self.ids[-1] + 100))
+
+    async def test_insert_is_idempotent(self):
+        again = await self.storage.insert_results("result_12", [
+            row12("たこ みる", "AA", 20),
+            row12("みる", "DD", 12),
+        ])
+        # 登録済みの request_key は既存の行がそのまま返る
+        self.assertEqual(again[0]["result_id"], self.ids[0])
+        self.assertNotIn(again[1]["result_id"], self.ids)
+        self.assertEqual(await self.storage.count_results("result_12"), 5)
+        self.assertEqual(await self.players("result_12", self.ids[0]), ["たこ", "みる"])
+        self.assertEqual(await self.players("result_12", again[1]["result_id"]), ["みる"])
+
+    async def test_insert_single_row(self):
+        row = await self.storage.insert_result("result_12", row12("あな", "EE", 10))
+        self.assertEqual(row["enemy"], "EE")
+        self.assertEqual(await self.storage.count_results("result_12", member="あな"), 4)
+
+    async def test_insert_empty(self):
+        self.assertEqual(await self.storage.insert_results("result_12", []), [])
+        # 全件が再送でも result_player への executemany は空のリストで呼ばれる
+        again = await self.storage.insert_results("result_12", [row12("たこ みる", "AA", 20)])
+        self.assertEqual([r["result_id"] for r in again], self.ids[:1])
+        self.assertEqual(await self.storage.count_results("result_12"), 4)
+
+    async def test_insert_unknown_table(self):
+        with self.assertRaises(ValueError):
+            await self.storage.insert_results("result_99", [row12("たこ", "AA", 20)])
+
+    async def test_delete(self):
+        await self.storage.delete_result("result_12", self.ids[0])
+        self.assertIsNone(await self.storage.fetch_result("result_12", self.ids[0]))
+        self.assertEqual(await self.players("result_12", self.ids[0]), [])
+        self.assertEqual(await self.storage.count_results("result_12", member="たこ"), 2)
+        # 存在しない行の削除はエラーにならない
+        await self.storage.delete_result("result_12", self.ids[0])
+
+
+# 代役（SQLite）での実行
+class SqliteStandInTest(PostgresStorageCases, unittest.IsolatedAsyncioTestCase):
+    async def make_storage(self):
+        storage = PostgresStorage(dsn="postgresql://stand-in")
+        storage.pool = SqliteStandIn()
+        return storage
+
+    async def test_queries_are_fixed_strings(self):
+        # 同じ形のクエリは同じ文字列になり、プリペアドステートメントが再利用される
+        pool = self.storage.pool
+        pool.executed.clear()
+        await self.storage.count_results("result_12", member="たこ")
+        await self.storage.count_results("result_12", enemy="AA")
+        self.assertEqual(len(set(pool.executed)), 1)
+
+
+# 実際の Postgres での実行（POSTGRES_TEST_DSN があるときのみ）
+@unittest.skipUnless(TEST_DSN, "POSTGRES_TEST_DSN が設定されていません")
+class PostgresTest(PostgresStorageCases, unittest.IsolatedAsyncioTestCase):
+    async def make_storage(self):
+        storage = PostgresStorage(dsn=TEST_DSN)
+        pool = await storage.get_pool()
+        await pool.execute(POSTGRES_SCHEMA)
+        return storage
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,244 @@
+"""
+WriteQueue の再試行・退避のテスト
+
+    cd app
+    python -m unittest tests.test_write_queue
+"""
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+
+# ネットワークなしで import できるようにローカルのストレージを指定しておく
+os.environ.setdefault("DB_BACKEND", "sqlite")
+os.environ.setdefault("SQLITE_PATH", ":memory:")
+
+from services import write_queue as wq      # noqa: E402
+from services.database import db            # noqa: E402
+from services.result_mirror import ResultMirror     # noqa: E402
+from services.write_queue import WriteQueue, is_permanent_error     # noqa: E402
+
+
+# SQLSTATE 付きのエラー（asyncpg / PostgREST の代わり）
+class SqlStateError(Exception):
+    def __init__(self, sqlstate):
+        super().__init__(f"sqlstate {sqlstate}")
+        self.sqlstate = sqlstate
+
+
+class ApiError(Exception):
+    def __init__(self, code):
+        super().__init__(f"code {code}")
+        self.code = code
+
+
+# 指定した request_key の登録だけ失敗させる DB
+class FakeDatabase:
+    def __init__(self):
+        self.failures = {}      # request_key -> 投げる例外
+        self.rows = {}          # request_key -> 行
+        self.calls = 0
+
+    async def insert_results(self, table, rows):
+        self.calls += 1
+        for row in rows:
+            error = self.failures.get(row["request_key"])
+            if error is not None:
+                raise error
+        for row in rows:
+            self.rows.setdefault(row["request_key"], {**row, "result_id": len(self.rows) + 1})
+        return [self.rows[row["request_key"]] for row in rows]
+
+    async def delete_result(self, table, result_id):
+        pass
+
+
+class FakeMirror:
+    def __init__(self):
+        self.added = []
+        self.removed = []
+
+    def add(self, table, row):
+        self.added.append(row["request_key"])
+
+    def remove(self, table, result_id):
+        self.removed.append(result_id)
+
+
+def read_lines(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class IsPermanentErrorTest(unittest.TestCase):
+    def test_data_errors_are_permanent(self):
+        self.assertTrue(is_permanent_error(ValueError("bad row")))
+        self.assertTrue(is_permanent_error(KeyError("player")))
+        self.assertTrue(is_permanent_error(sqlite3.IntegrityError("NOT NULL")))
+        self.assertTrue(is_permanent_error(SqlStateError("23502")))
+        self.assertTrue(is_permanent_error(SqlStateError("22P02")))
+        self.assertTrue(is_permanent_error(ApiError("42703")))
+
+    def test_connectivity_errors_are_retried(self):
+        self.assertFalse(is_permanent_error(TimeoutError()))
+        self.assertFalse(is_permanent_error(ConnectionResetError()))
+        self.assertFalse(is_permanent_error(OSError("network unreachable")))
+        self.assertFalse(is_permanent_error(sqlite3.OperationalError("database is locked")))
+        self.assertFalse(is_permanent_error(SqlStateError("08006")))
+        self.assertFalse(is_permanent_error(SqlStateError("57P01")))
+        # PostgREST が JSON を返せなかったとき（一時停止中の Supabase など）は HTTP ステータス
+        self.assertFalse(is_permanent_error(ApiError(503)))
+        self.assertFalse(is_permanent_error(RuntimeError("unknown")))
+
+
+class WriteQueueTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "journal.jsonl")
+        self.dead = self.path + ".dead"
+        self.db = FakeDatabase()
+        self.mirror = FakeMirror()
+        self.queue = WriteQueue(self.db, self.mirror, self.path, self.dead)
+
+    async def asyncTearDown(self):
+        self.dir.cleanup()
+
+    async def enqueue(self, n):
+        return [
+            await self.queue.enqueue_insert("result_12", {"player": f"p{i}"})
+            for i in range(n)
+        ]
+
+    async def flush_until_settled(self, tries):
+        for _ in range(tries):
+            try:
+                await self.queue.flush()
+                return
+            except Exception:
+                pass
+
+    async def test_enqueue_is_journaled(self):
+        keys = await self.enqueue(3)
+        self.assertEqual([e["key"] for e in read_lines(self.path)], keys)
+
+        # 再起動後も同じ書き込み待ちが読み込まれる
+        other = WriteQueue(self.db, self.mirror, self.path, self.dead)
+        other.load()
+        self.assertEqual([e["key"] for e in other.pending], keys)
+
+    async def test_flush_writes_and_clears_journal(self):
+        keys = await self.enqueue(3)
+        await self.queue.flush()
+        self.assertEqual(self.mirror.added, keys)
+        self.assertEqual(self.db.calls, 1)
+        self.assertEqual(read_lines(self.path), [])
+
+    async def test_transient_errors_are_never_dead_lettered(self):
+        keys = await self.enqueue(2)
+        self.db.failures[keys[0]] = TimeoutError()
+
+        await self.flush_until_settled(wq.MAX_ATTEMPTS * 3)
+
+        # 先頭はジャーナルに残ったまま、後続も追い越さない
+        self.assertEqual([e["key"] for e in self.queue.pending], keys)
+        self.assertEqual(self.queue.pending[0]["attempts"], wq.MAX_ATTEMPTS * 3)
+        self.assertEqual(read_lines(self.path)[0]["attempts"], wq.MAX_ATTEMPTS * 3)
+        self.assertEqual(read_lines(self.dead), [])
+
+        # DB が戻れば順に書き込まれる
+        del self.db.failures[keys[0]]
+        await self.queue.flush()
+        self.assertEqual(self.mirror.added, keys)
+        self.assertEqual(self.queue.pending, [])
+
+    async def test_permanent_error_is_dead_lettered_after_max_attempts(self):
+        keys = await self.enqueue(3)
+        self.db.failures[keys[1]] = SqlStateError("23502")
+
+        await self.flush_until_settled(wq.MAX_ATTEMPTS + 1)
+
+        self.assertEqual(self.mirror.added, [keys[0], keys[2]])
+        self.assertEqual(self.queue.pending, [])
+        self.assertEqual(read_lines(self.path), [])
+
+        dead = read_lines(self.dead)
+        self.assertEqual([e["key"] for e in dead], [keys[1]])
+        self.assertEqual(dead[0]["attempts"], wq.MAX_ATTEMPTS)
+        self.assertIn("23502", dead[0]["error"])
+
+    async def test_failed_batch_is_retried_one_by_one(self):
+        keys = await self.enqueue(3)
+        self.db.failures[keys[0]] = ValueError("bad row")
+
+        with self.assertRaises(ValueError):
+            await self.queue.flush()
+        self.assertEqual(self.db.calls, 1)
+
+        # 失敗したまとめ書きの分は原因を切り分けるため1件ずつ試し直す
+        del self.db.failures[keys[0]]
+        await self.queue.flush()
+        self.assertEqual(self.db.calls, 1 + 3)
+        self.assertEqual(self.mirror.added, keys)
+
+    async def test_enqueue_delete_hides_row(self):
+        await self.queue.enqueue_delete("result_12", 42)
+        self.assertEqual(self.mirror.removed, [42])
+        self.assertEqual(read_lines(self.path)[0]["op"], "delete")
+
+
+
+# 反映待ちの削除とミラーの同期（メモリ上の SQLite を使う）
+class PendingDeleteSyncTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "journal.jsonl")
+        rows = await db.insert_results("result_12", [
+            {
+                "player": "たこ", "my_score": 50, "enemy": f"E{i}", "enemy_score": 40,
+                "date": f"2024/05/01 {i:02d}", "played_at": f"2024-05-01T{i:02d}:00:00",
+                "request_key": f"{self.id()}-{i}",
+            }
+            for i in range(3)
+        ])
+        self.ids = [r["result_id"] for r in rows]
+        self.mirror = ResultMirror(db)
+        self.queue = WriteQueue(db, self.mirror, self.path, self.path + ".dead")
+
+    async def asyncTearDown(self):
+        await self.queue.stop()
+        for result_id in self.ids:
+            await db.delete_result("result_12", result_id)
+        self.dir.cleanup()
+
+    async def test_full_sync_keeps_pending_delete_hidden(self):
+        self.queue.start()
+        await self.queue.stop()     # フラッシュさせずに反映待ちのままにする
+        await self.mirror.sync("result_12", full=True)
+
+        await self.queue.enqueue_delete("result_12", self.ids[1])
+        await self.mirror.sync("result_12", full=True)
+        self.assertNotIn(self.ids[1], self.mirror.tables["result_12"].rows)
+        self.assertIn(self.ids[0], self.mirror.tables["result_12"].rows)
+
+        await self.queue.flush()
+        await self.mirror.sync("result_12", full=True)
+        self.assertNotIn(self.ids[1], self.mirror.tables["result_12"].rows)
+
+    async def test_journaled_delete_stays_hidden_after_restart(self):
+        await self.queue.enqueue_delete("result_12", self.ids[2])
+
+        # 再起動：ジャーナルを読み込んでから初回の全件同期
+        mirror = ResultMirror(db)
+        queue = WriteQueue(db, mirror, self.path, self.path + ".dead")
+        mirror.watch_pending_deletes(queue.pending_deletes)
+        queue.load()
+        await mirror.sync_all(full=True)
+        self.assertNotIn(self.ids[2], mirror.tables["result_12"].rows)
+        self.assertEqual(await mirror.count_results("result_12"), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()